@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Headless keystroke-trace benchmark for the overlay.
+
+Replays a recorded or synthetic keystroke trace (typing, backspaces, ENTER
+submits, contains-mode syllable prompts and TAB autocompletes) through
+WordSuggester.suggest, QuerySession (default and letter-coverage ranking)
+and the full TypingOverlay pipeline on the offscreen Qt platform, and
+reports per-keystroke latency percentiles, startup time and peak RSS, plus
+the typo fallback's latency and how closely autocomplete typing holds its
+planned key gaps under load. Every
+default-ranked answer is checked against the original linear-scan suggest,
+so a speedup can't silently change the suggestions.
+
+Trace files hold one event per line: a letter, BACKSPACE, ENTER or TAB.
+"""
+
+import os, sys, time, random, argparse, subprocess, threading
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import wordbomb_typing_overlay as overlay
+from PyQt5 import QtWidgets
+
+class ReferenceSuggester:
+    """The original set + sorted list implementation, used as the oracle."""
+    def __init__(self, words):
+        self._set = set(words)
+        self._list = sorted(self._set)
+
+    def suggest(self, letters, limit=5):
+        if not letters:
+            return [], True
+        results = [w for w in self._list if w.startswith(letters)]
+        prefix_mode = True
+        if not results:
+            results = [w for w in self._list if letters in w]
+            prefix_mode = False
+        results_sorted = sorted(results, key=lambda x: (len(x), x))
+        if results_sorted:
+            longest_word = max(results, key=len)
+            if longest_word not in results_sorted[:limit]:
+                results_sorted = results_sorted[:max(0, limit-1)] + [longest_word]
+            else:
+                results_sorted = results_sorted[:limit]
+        return results_sorted, prefix_mode
+
+    def remove_word(self, word):
+        if word in self._set:
+            self._set.remove(word)
+            self._list.remove(word)
+            return True
+        return False
+
+def synthetic_trace(suggester, n_keys, rnd):
+    words = [suggester.word(i) for i in rnd.sample(range(len(suggester)), min(len(suggester), 4000))]
+    syllables = []
+    for w in words:
+        for n in (2, 3):
+            for j in range(1, len(w)-n):
+                g = w[j:j+n]
+                if not suggester.suggest(g)[1]:
+                    syllables.append((g, w))
+    trace = []
+    while len(trace) < n_keys:
+        word = rnd.choice(words)
+        r = rnd.random()
+        if r < 0.2 and syllables:
+            # contains prompt: type the syllable, clear it, answer with a word holding it
+            g, word = rnd.choice(syllables)
+            trace += list(g) + ["BACKSPACE"]*len(g)
+        elif r < 0.4 and len(word) > 4:
+            trace += list(word[:rnd.randint(2, 3)]) + ["TAB", "ENTER"]
+            continue
+        for c in word:
+            if rnd.random() < 0.05:
+                trace += [rnd.choice("abcdefghijklmnopqrstuvwxyz"), "BACKSPACE"]
+            trace.append(c)
+        trace.append("ENTER")
+    return trace
+
+def typo_prompts(suggester, n, rnd):
+    """Prefixes of random words with one or two typos that nothing matches any more."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    prompts = []
+    while len(prompts) < n:
+        word = suggester.word(rnd.randrange(len(suggester)))
+        if len(word) < 4:
+            continue
+        typed = list(word[:rnd.randint(4, len(word))])
+        for _ in range(rnd.randint(1, 2)):
+            p = rnd.randrange(1, len(typed))
+            edit = rnd.random()
+            if edit < 0.4:
+                typed[p] = rnd.choice(letters)
+            elif edit < 0.7:
+                typed.insert(p, rnd.choice(letters))
+            elif edit < 0.85:
+                del typed[p]
+            elif p + 1 < len(typed):
+                typed[p], typed[p+1] = typed[p+1], typed[p]
+        typed = "".join(typed)
+        if not suggester.suggest(typed)[0]:
+            prompts.append(typed)
+    return prompts
+
+def read_trace(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def percentiles(samples):
+    s = sorted(samples)
+    if not s:
+        return {}
+    pick = lambda q: s[min(len(s)-1, int(q*len(s)))]
+    return {"n": len(s), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": s[-1]}
+
+def report(name, samples, mismatches=None):
+    p = percentiles(samples)
+    if not p:
+        print(f"{name:<22} no samples")
+        return
+    line = (f"{name:<22} n={p['n']:<6} p50={p['p50']*1e6:8.1f}us p95={p['p95']*1e6:8.1f}us "
+            f"p99={p['p99']*1e6:8.1f}us max={p['max']*1e3:7.2f}ms")
+    if mismatches is not None:
+        line += f" mismatches={mismatches}"
+    print(line)
+
+class Replay:
+    """Drive a suggest(letters) engine through a trace the way the overlay does."""
+    def __init__(self, suggester, reference):
+        self.suggester = suggester
+        self.reference = reference
+        self.buffer = ""
+        self.samples = []
+        self.mismatches = 0
+
+    def check(self, letters, got):
+        if self.reference is None:
+            return
+        expected = self.reference.suggest(letters, overlay.SUGGESTION_COUNT)
+        if (list(got[0]), got[1]) != (expected[0], expected[1]):
+            self.mismatches += 1
+            if self.mismatches <= 3:
+                print(f"  mismatch for {letters!r}: {got} != {expected}")
+
+    def key(self, event):
+        raise NotImplementedError
+
+    def submit(self):
+        word = self.buffer
+        if word in self.suggester:
+            self.suggester.remove_word(word)
+            if self.reference is not None:
+                self.reference.remove_word(word)
+
+    def run(self, trace):
+        for event in trace:
+            if event == "TAB":
+                suggestions, prefix_mode = self.suggester.suggest(self.buffer, overlay.SUGGESTION_COUNT)
+                if suggestions and prefix_mode:
+                    longest = max(suggestions, key=len)
+                    for c in longest[len(self.buffer):]:
+                        self.key(c)
+            else:
+                self.key(event)
+
+class EngineReplay(Replay):
+    def __init__(self, suggester, reference, engine):
+        super().__init__(suggester, reference)
+        self.engine = engine
+        self.session = overlay.QuerySession(suggester) if engine in ("session", "coverage") else None
+        self.remaining = overlay.ALL_LETTERS if engine == "coverage" else None
+
+    def key(self, event):
+        if event == "BACKSPACE":
+            self.buffer = self.buffer[:-1]
+        elif event == "ENTER":
+            if self.remaining is not None and self.buffer in self.suggester:
+                self.remaining &= ~overlay._letter_mask(self.buffer)
+                self.remaining = self.remaining or overlay.ALL_LETTERS
+            self.submit()
+            self.buffer = ""
+            if self.session is not None:
+                self.session.reset()
+        else:
+            self.buffer += event.lower()
+        query = self.session.suggest if self.session is not None else self.suggester.suggest
+        start = time.perf_counter()
+        if self.remaining is not None:
+            got = query(self.buffer, overlay.SUGGESTION_COUNT, self.remaining)
+        else:
+            got = query(self.buffer, overlay.SUGGESTION_COUNT)
+        self.samples.append(time.perf_counter() - start)
+        self.check(self.buffer, got)
+
+class OverlayReplay(Replay):
+    """Keystrokes through TypingOverlay.on_update_signal, timed until the
+    worker's suggestions for that buffer have been rendered."""
+    def __init__(self, app, suggester, reference):
+        super().__init__(suggester, reference)
+        self.app = app
+        self.ui = overlay.TypingOverlay(suggester)
+        self.ui.worker.ready.connect(self.on_ready)
+        self.handler_samples = []
+        self.rendered = None
+
+    def on_ready(self, generation, letters, suggestions, prefix_mode, corrections, is_word):
+        if generation == self.ui.suggest_generation:
+            self.rendered = (time.perf_counter(), letters, suggestions, prefix_mode)
+
+    def key(self, event):
+        self.rendered = None
+        start = time.perf_counter()
+        self.ui.on_update_signal(event)
+        self.handler_samples.append(time.perf_counter() - start)
+        deadline = start + 5.0
+        while self.rendered is None and time.perf_counter() < deadline:
+            self.app.processEvents()
+        if self.rendered is None:
+            print(f"  no suggestions rendered for {self.ui.buffer!r}")
+            return
+        done, letters, suggestions, prefix_mode = self.rendered
+        self.samples.append(done - start)
+        self.check(letters, (suggestions, prefix_mode))
+
+    def submit(self):
+        # the overlay removes the word itself, keep the oracle in step
+        if self.reference is not None and self.buffer in self.suggester:
+            self.reference.remove_word(self.buffer)
+
+    def run(self, trace):
+        for event in trace:
+            self.buffer = self.ui.buffer
+            if event == "ENTER":
+                self.submit()
+            if event == "TAB":
+                suggestions, prefix_mode = self.suggester.suggest(self.ui.buffer, overlay.SUGGESTION_COUNT)
+                if suggestions and prefix_mode:
+                    longest = max(suggestions, key=len)
+                    for c in longest[len(self.ui.buffer):]:
+                        self.key(c)
+            else:
+                self.key(event)
+
+def typer_timing(suggester, trace, keys, seed):
+    """Autocomplete key gaps while the main thread keeps replaying the trace,
+    the way the GUI thread is busy while the typer runs."""
+    done = threading.Event()
+    typer = overlay.KeystrokeTyper(lambda ch: None, lambda ch: None, on_done=lambda run: done.set(),
+                                   rng=random.Random(seed))
+    typer.start("x" * keys)
+    replay = EngineReplay(suggester, None, "session")
+    while not done.is_set():
+        replay.run(trace)
+    return typer.gap_stats()
+
+def exhausted_prompts(suggester, reference, n, rnd):
+    """
+    Syllable prompts whose precomputed longest answers have all been used:
+    remove the PROMPT_LONGEST_K longest words holding each syllable (plus a
+    few of the shortest for syllables with more matches), then check suggest
+    and a QuerySession against the oracle. Returns (prompts, mismatches).
+    """
+    grams = [g.decode("utf-8") for g, posting in suggester._grams.items()
+             if overlay.PROMPT_LONGEST_K < len(posting) <= 4 * overlay.PROMPT_TOP_K]
+    prompts = rnd.sample(grams, min(n, len(grams)))
+    mismatches = 0
+    for g in prompts:
+        matches = [w for w in reference._list if g in w]
+        longest = sorted(matches, key=lambda w: (-len(w), w))[:overlay.PROMPT_LONGEST_K]
+        shortest = sorted(matches, key=lambda w: (len(w), w))[:rnd.randint(0, 3)]
+        for w in {*longest, *shortest}:
+            suggester.remove_word(w)
+            reference.remove_word(w)
+        expected = reference.suggest(g, overlay.SUGGESTION_COUNT)
+        for got in (suggester.suggest(g, overlay.SUGGESTION_COUNT),
+                    overlay.QuerySession(suggester).suggest(g, overlay.SUGGESTION_COUNT)):
+            if (list(got[0]), got[1]) != expected:
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"  mismatch for exhausted {g!r}: {got} != {expected}")
+    return prompts, mismatches
+
+def cold_start():
+    """Fresh interpreter: import, load the dictionary and answer one prompt."""
+    code = ("import time; t=time.perf_counter(); import wordbomb_typing_overlay as m; "
+            "s=m.load_suggester(); s.suggest('a'); print(time.perf_counter()-t)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return float(out.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return None
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024*1024) if sys.platform == "darwin" else peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trace", help="replay this trace file instead of a synthetic one")
+    parser.add_argument("--save-trace", help="write the trace that was replayed to this file")
+    parser.add_argument("--keys", type=int, default=600, help="length of the synthetic trace")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-check", action="store_true", help="skip the reference oracle")
+    parser.add_argument("--no-ui", action="store_true", help="skip the TypingOverlay pipeline")
+    parser.add_argument("--typer-keys", type=int, default=40, help="autocomplete keys to time (0 to skip)")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    print("startup:")
+    t = cold_start()
+    print(f"  cold start to first suggestion  {t*1e3:8.1f} ms" if t is not None else "  cold start failed")
+    start = time.perf_counter()
+    suggester = overlay.load_suggester()
+    print(f"  load_suggester (in process)     {(time.perf_counter()-start)*1e3:8.1f} ms")
+    start = time.perf_counter()
+    words = overlay.load_wordlist()
+    staged = overlay.WordSuggester(words, defer_contains=True)
+    print(f"  prefix stage from text          {(time.perf_counter()-start)*1e3:8.1f} ms")
+    staged.build_contains()
+    print(f"  index from text                 {(time.perf_counter()-start)*1e3:8.1f} ms")
+
+    trace = read_trace(args.trace) if args.trace else synthetic_trace(suggester, args.keys, random.Random(args.seed))
+    if args.save_trace:
+        with open(args.save_trace, "w", encoding="utf-8") as f:
+            f.write("\n".join(trace) + "\n")
+    print(f"trace: {len(trace)} events")
+
+    print("per-keystroke latency:")
+    for engine in ("suggest", "session", "coverage"):
+        # the oracle only knows the default ranking
+        check = not args.no_check and engine != "coverage"
+        replay = EngineReplay(overlay.load_suggester(), ReferenceSuggester(words) if check else None, engine)
+        replay.run(trace)
+        report(engine, replay.samples, replay.mismatches if check else None)
+    if not args.no_check:
+        prompts, mismatches = exhausted_prompts(overlay.load_suggester(), ReferenceSuggester(words), 200,
+                                                random.Random(args.seed))
+        print(f"{'exhausted prompts':<22} n={len(prompts):<6} mismatches={mismatches}")
+    samples, answered = [], 0
+    for typed in typo_prompts(suggester, 200, random.Random(args.seed)):
+        start = time.perf_counter()
+        answered += bool(suggester.fuzzy(typed, overlay.SUGGESTION_COUNT))
+        samples.append(time.perf_counter() - start)
+    report("fuzzy fallback", samples)
+    print(f"  corrected {answered} of {len(samples)} typo'd prefixes")
+    if not args.no_ui:
+        replay = OverlayReplay(app, overlay.load_suggester(), None if args.no_check else ReferenceSuggester(words))
+        replay.run(trace)
+        report("overlay handler", replay.handler_samples)
+        report("overlay to render", replay.samples, None if args.no_check else replay.mismatches)
+        print(f"  stages {replay.ui.tracer.summary()}")
+
+    if args.typer_keys:
+        g = typer_timing(overlay.load_suggester(), trace, args.typer_keys, args.seed)
+        print("autocomplete key gaps (ms):")
+        print(f"  planned  mean={g['planned_mean']:6.1f} sd={g['planned_sd']:5.1f}   "
+              f"achieved mean={g['achieved_mean']:6.1f} sd={g['achieved_sd']:5.1f}")
+        print(f"  error    p50={g['error_p50']:6.2f} p95={g['error_p95']:6.2f} max={g['error_max']:6.2f}  n={g['n']}")
+
+    rss = peak_rss_mb()
+    print(f"peak RSS: {rss:.1f} MB" if rss is not None else "peak RSS: n/a")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Memory used by the word storage of the overlay.
+
+Compares the old representation (a set plus a sorted list of str objects)
+with WordSuggester's packed buffer + offsets + lengths, both built from the
+text word list and mmapped from the compiled dictionary. Sizes are Python
+heap allocations as seen by tracemalloc; mmapped pages are reported
+separately since they're shared and backed by the file.
+"""
+
+import gc, os, sys, tracemalloc
+
+import wordbomb_typing_overlay as overlay
+
+def mb(n):
+    return f"{n / (1024*1024):7.1f} MB"
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+def main():
+    # the word list is read inside each measurement, so the str objects are
+    # counted only where they are kept alive
+    print(f"{len(overlay.load_wordlist())} words from {overlay.find_wordlist() or 'built-in list'}")
+
+    def old_storage():
+        word_set = set(overlay.load_wordlist())
+        return word_set, sorted(word_set)
+    old, old_size = traced(old_storage)
+    del old
+    print(f"before: set + sorted list of str     {mb(old_size)}")
+
+    suggester, total = traced(lambda: overlay.WordSuggester(overlay.load_wordlist()))
+    packed = sum(sys.getsizeof(a) for a in (suggester._blob, suggester._offsets, suggester._lengths))
+    print(f"after:  packed blob/offsets/lengths  {mb(packed)}")
+    print(f"        WordSuggester incl. indices  {mb(total)}")
+
+    source = overlay.find_wordlist()
+    if source is None:
+        return
+    path = os.path.join(overlay._cache_dir(), os.path.splitext(os.path.basename(source))[0] + overlay.DICT_SUFFIX)
+    digest = overlay._file_digest(source)
+    if overlay.read_compiled_dictionary(path, digest) is None:
+        overlay.write_compiled_dictionary(suggester, path, digest)
+    del suggester
+    mapped, heap = traced(lambda: overlay.WordSuggester(index=overlay.read_compiled_dictionary(path, digest)))
+    print(f"        mmapped WordSuggester heap   {mb(heap)} (+{mb(os.path.getsize(path)).strip()} mapped)")
+
+if __name__ == "__main__":
+    main()
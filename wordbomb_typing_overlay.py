@@ -5,19 +5,125 @@ WordBomb Typing Overlay with improved TAB autocomplete behavior
 - Enter cancels an in-progress autocomplete
 - Autocomplete runs 1.5x faster than the previous version (~66.7ms mean per char)
 - Submitted words are removed from the suggester so they won't be suggested again
+  (F9 starts a new game with every word available again)
+- Prefix lookups use a bisect range index with cached shortest/longest words per prefix
+- Contains lookups use a bigram/trigram inverted index kept in (length, word) order
+- Suggestions are computed on a worker thread; results for outdated buffers are dropped
+- The indexed dictionary is compiled to a .wbd file and mmapped on later starts
+  (`--compile` writes it next to the word list for bundling)
+- F10 shows per-keystroke latency percentiles and dumps the trace to the cache dir
+- Autocomplete keys are sent by one typer thread from a precomputed delay plan,
+  so their gaps hold while the GUI thread is busy; achieved gaps are measured
+- Fire particles live in fixed-size NumPy pools and are updated with vector operations
+- The animation timer stops while nothing moves (`--fps N` / `--low-power` cap the
+  frame rate, `--animate-idle` keeps the border rotating)
+- Background and border rotations are cached as pixmaps; frames repaint only the
+  border strips and the area the particles cover
+- Suggestions are painted from cached QStaticText runs instead of rich-text HTML
+- Used words and the high score are journaled to the cache dir and restored on start
+- F6 ranks suggestions by how many letters not used yet this life they cover
+- A buffer nothing matches is treated as a typo: words for the nearest prefixes
+  within two edits are shown in pink
+- The window and keyboard hook come up before the dictionary: it loads in the
+  background in stages (prefix search, then contains search), keys typed meanwhile
+  are answered as each stage lands, and the status line shows the progress
+- `--query [FILE]` answers prompts from a file or stdin as JSON lines on a process pool
+- `--daemon` serves one index to every overlay on the machine; `--use-daemon`
+  makes an overlay a thin client of it (`--profile` keeps instances' games apart)
 """
 
-import sys, re, os, random, math
+import sys, re, os, random, math, heapq, threading, hashlib, mmap, struct, time, json, argparse
+import socket, subprocess, itertools, copy, signal
+from collections import deque, OrderedDict
+from array import array
 from pathlib import Path
-from pynput import keyboard
-from pynput.keyboard import Controller as KController
 from PyQt5 import QtWidgets, QtCore, QtGui
 
+keyboard = None  # pynput.keyboard, imported by _keyboard() once the overlay is up
+np = None        # numpy, imported by _numpy() for coverage ranking and the fire particles
+
 WORDLIST_CANDIDATES = ["words_alpha.txt", "/usr/share/dict/words"]
 SUGGESTION_COUNT = 5
 OVERLAY_WIDTH = 480
 OVERLAY_HEIGHT = 280
-MAX_PARTICLES = 50
+MAX_PARTICLES = 400     # capacity of the fire particle pool
+MAX_EXTRA_EFFECTS = 360 # 4 sparks per frame, living at most 90 frames
+FIRE_COLOR_SPAN = 50    # word length at which the fire color stops shifting
+TICK_MS = 30            # animation step; frames further apart run several steps
+FRAME_MS = 30           # default frame interval while something is animating
+LOW_POWER_FRAME_MS = 100
+BORDER_PHASES = 20      # cached border rotations, one per fast_phase step
+BORDER_STRIP = 20       # width of the window edge the rounded borders are drawn in
+MAX_WORD_LEN = 255      # longest word kept, lengths are stored in one byte
+PREFIX_TOP_K = 8        # shortest words cached per prefix node
+PREFIX_NODE_MIN = 64    # prefix ranges this small are scanned instead of cached
+PROMPT_TOP_K = 16       # shortest answers precomputed per 2/3-letter prompt
+PROMPT_LONGEST_K = 8    # longest answers precomputed per 2/3-letter prompt
+ALL_LETTERS = (1 << 26) - 1  # letter mask of the whole alphabet
+COMPACT_BATCH = 32      # used words between background compactions of the prefix cache
+FUZZY_MAX_EDITS = 2     # typos corrected when nothing matches the buffer
+FUZZY_SHORT = 4         # buffers this short only get one typo corrected
+FUZZY_MAX_VISITS = 500  # typo search stops after trying this many edited strings (a few ms)
+TRACE_CAPACITY = 512    # keystrokes kept by the latency tracer
+TYPER_SPIN_MS = 2.0     # autocomplete keys are timed by spinning this close to their deadline
+TYPER_GRACE_MS = 40     # listener events from the last typed key are still ignored this long
+STATUS_TEXT = "F6: coverage | F7: hide | F8: quit | F9: new game | F10: stats | Tab: complete"
+DICT_SUFFIX = ".wbd"    # compiled dictionary, written next to the word list or in the cache dir
+DICT_MAGIC = b"WBDICT\x00\x02"
+DICT_SECTIONS = ("words", "offsets", "lengths", "order", "gram_keys", "gram_starts",
+                 "postings", "node_keys", "node_starts", "node_ids", "prompt_starts", "prompt_ids")
+# magic, byte order tag, sha1 of the source word list, word count, section count
+_DICT_HEADER = struct.Struct("<8sI20sII")
+_DICT_SECTION = struct.Struct("<QQ")  # offset, length
+JOURNAL_NAME = "game{}.wbj"  # used words and stats of the current game, in the cache dir
+JOURNAL_MAGIC = b"WBJRNL\x00\x01"
+JOURNAL_FLUSH_MS = 200  # records are written and fsynced in batches this far apart
+JOURNAL_SLACK = 256     # obsolete records tolerated before the journal is compacted
+_JOURNAL_HEADER = struct.Struct("<8s20s")  # magic, sha1 of the word list
+_JOURNAL_RECORD = struct.Struct("<BI")     # record type, word ID or value
+QUERY_CHUNK = 256       # prompts per task in --query mode
+DAEMON_SOCKET = "daemon.sock"  # in the cache dir, where Unix sockets are available
+DAEMON_PORT = 47213     # loopback port otherwise
+DAEMON_TIMEOUT = 5.0    # seconds to wait for a daemon reply
+DAEMON_START_TIMEOUT = 120.0  # seconds a starting daemon may take to load the dictionary
+DAEMON_LRU = 256        # suggest/membership answers cached by each client
+
+def _keyboard():
+    """
+    pynput.keyboard, imported on first use: importing it connects to the
+    display server, which the headless modes and the first frame of the
+    overlay don't need.
+    """
+    global keyboard
+    if keyboard is None:
+        from pynput import keyboard as module
+        keyboard = module
+    return keyboard
+
+def _numpy():
+    """
+    numpy, imported on first use: it takes longer to import than the whole
+    dictionary takes to map, and only coverage ranking and the fire need it.
+    """
+    global np
+    if np is None:
+        import numpy as module
+        np = module
+    return np
+
+_popcount16 = None  # set bits of every 16-bit value, for NumPy without bitwise_count
+
+def _popcount(values):
+    """Set bits of each uint32 in a NumPy array (bitwise_count is NumPy 2 only)."""
+    global _popcount16
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    if _popcount16 is None:
+        table = np.zeros(1 << 16, dtype=np.uint8)
+        for bit in range(16):
+            table += (np.arange(1 << 16) >> bit & 1).astype(np.uint8)
+        _popcount16 = table
+    return _popcount16[values & 0xFFFF] + _popcount16[values >> 16]
 
 def get_resource_path(relative_path):
     try:
@@ -26,57 +132,1891 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def load_wordlist():
+def find_wordlist():
     for path in WORDLIST_CANDIDATES:
         full_path = get_resource_path(path)
         if Path(full_path).exists():
-            with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-                return [w.strip().lower() for w in f if w.strip()]
+            return full_path
+    return None
+
+def _cache_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "WordBombHelper")
+
+def load_wordlist():
+    full_path = find_wordlist()
+    if full_path is not None:
+        with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
+            return [w.strip().lower() for w in f if w.strip()]
     return ["test", "word", "bomb", "play", "game", "overlay",
             "autocomplete", "realistic", "typing", "longest", "suggestion"]
 
+def _prefix_end(prefix):
+    # smallest byte string greater than every byte string starting with prefix
+    return prefix[:-1] + bytes((prefix[-1] + 1,))
+
+def _pick_suggestions(top, longest, limit):
+    """Shortest `limit` words, with the last slot forced to the longest match."""
+    results = top[:limit]
+    if longest not in results:
+        results = top[:max(0, limit-1)] + [longest]
+    return results
+
+def _letter_mask(word):
+    """26-bit set of the a-z letters in word."""
+    mask = 0
+    for c in word:
+        if "a" <= c <= "z":
+            mask |= 1 << (ord(c) - 97)
+    return mask
+
+def _advance(entry, used, cursor):
+    """Move a prompt entry's (front, back) cursors past its used IDs."""
+    (short, longest), (front, back) = entry, cursor
+    while front < len(short) and used[short[front]]:
+        front += 1
+    while back < len(longest) and used[longest[back]]:
+        back += 1
+    return front, back
+
+def _gram_keys(word):
+    n = len(word)
+    return {*[word[j:j+2] for j in range(n-1)], *[word[j:j+3] for j in range(n-2)]}
+
 class WordSuggester:
-    def __init__(self, words):
-        self._set = set(words)
-        self._list = sorted(self._set)
+    """
+    Sorted word list with prefix and contains indices. The words live in one
+    packed UTF-8 buffer (separated by newlines) addressed through an offsets
+    array, and are referred to everywhere by ID, their position in sorted
+    order. IDs never change: submitted words are marked in a tombstone layer
+    instead of being deleted, so no index is rebuilt when a word is used and
+    a new round only clears the used IDs.
+
+    Lookups read a generation (see snapshot()): a shallow copy sharing every
+    index, whose tombstones and prompt cursors never change once published.
+    Writers build the next generation's tombstones from a copy and publish it
+    by swapping one reference, so readers on the listener, GUI and worker
+    threads take no lock and never see a half-applied change.
+    """
+    def __init__(self, words=None, index=None, defer_contains=False):
+        # index: prebuilt (blob, offsets, lengths, nodes, order, grams, prompts)
+        # from a compiled dictionary, where blob is the mmap of the whole file.
+        # defer_contains: only build the prefix index, build_contains() adds the rest
+        if index is not None:
+            self._blob, self._offsets, self._lengths, nodes, order, grams, prompts = index
+        else:
+            words = [w for w in sorted(set(words)) if len(w) <= MAX_WORD_LEN]
+            encoded = [w.encode("utf-8") for w in words]
+            self._blob = b"\n".join(encoded)
+            self._offsets = array('I', [0])  # word i is blob[offsets[i]:offsets[i+1]-1]
+            for b in encoded:
+                self._offsets.append(self._offsets[-1] + len(b) + 1)
+            self._lengths = array('B', map(len, words))  # in characters, for ranking
+        self._count = len(self._lengths)
+        # tombstone flag per word ID, replaced (never mutated) by each new
+        # generation; this one only serves the index build below
+        self._empty = bytes(self._count)
+        self._used = self._empty
+        self._write_lock = threading.Lock()  # serializes writers, readers never take it
+        self._pending = []  # IDs used since the last compaction
+        self._compacting = False
+        self._lock = threading.Lock()
+        self.digest = None  # sha1 of the source word list, set by load_suggester
+        self.path = None    # compiled dictionary that can be mapped for the same words
+        self._masks = [None]  # letter mask per word ID, built on first coverage query
+        # prompt answer table: 2/3-letter substring -> (shortest IDs, longest
+        # IDs), filled lazily from the compiled table or the posting lists and
+        # shared by every generation (entries only depend on the word list).
+        # Cursors skip the entries that have been used since; each generation
+        # has its own, moved forward by remove_ids before it is published.
+        self._prompts = {}
+        self._cursors = {}
+        self._prompt_table = None
+        self.contains_ready = not defer_contains  # False: only prefix matches are found yet
+        if index is not None:
+            self._nodes, self._order, self._grams, self._prompt_table = nodes, order, grams, prompts
+        else:
+            # prefix -> (shortest IDs, longest IDs) for every prefix whose range in
+            # the sorted list is bigger than PREFIX_NODE_MIN. Both lists are the
+            # head of the range in that order, long enough to hold PREFIX_TOP_K
+            # (resp. one) live words, so restoring a word never invalidates them.
+            self._nodes = {}
+            if self._count:
+                self._build_node(b"", 0, self._count)
+            # contains index: every ID in (len, word) order, and each 2/3-letter
+            # substring -> IDs of the words containing it, in that same order.
+            # Left empty until build_contains() when deferred, so contains
+            # lookups find nothing instead of failing.
+            self._order, self._grams = array('I'), {}
+            if not defer_contains:
+                self._order, self._grams = self._build_contains(words)
+        self._generation = -1
+        self._publish(self._empty, {})
+
+    def _build_contains(self, words):
+        order = array('I', sorted(range(self._count), key=self._rank_key))
+        return order, self._build_grams(words, order)
+
+    def build_contains(self):
+        """
+        Second loading stage of a suggester built with defer_contains: index
+        the substrings, then publish a generation that answers contains
+        prompts. Lookups keep working on the prefix index meanwhile.
+        """
+        words = self._blob.decode("utf-8").split("\n") if self._count else []
+        order, grams = self._build_contains(words)
+        with self._write_lock:
+            self._order, self._grams = order, grams
+            self.contains_ready = True
+            self._publish(self._current._used, {})
+
+    def _publish(self, used, cursors):
+        """Make a new generation current. Only call with _write_lock held (or from __init__)."""
+        snap = copy.copy(self)
+        snap._used = used
+        snap._cursors = cursors
+        snap._generation = getattr(self, "_current", self)._generation + 1
+        snap._current = snap
+        self._current = snap
+
+    def snapshot(self):
+        """
+        The current generation, a read-only suggester whose used words never
+        change. Take one per lookup and ask it everything; a word used
+        meanwhile shows up in the next snapshot.
+        """
+        return self._current
+
+    @property
+    def version(self):
+        # bumped whenever the set of live words changes
+        return self._current._generation
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        i = self.word_id(word)
+        return i >= 0 and not self._current._used[i]
+
+    def _key(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i+1]-1]
+
+    def _has(self, i, sub):
+        return self._blob.find(sub, self._offsets[i], self._offsets[i+1]-1) >= 0
+
+    def word(self, i):
+        return self._key(i).decode("utf-8")
+
+    def _lower_bound(self, key, lo, hi):
+        # bisect_left over the packed buffer
+        blob, offsets = self._blob, self._offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if blob[offsets[mid]:offsets[mid+1]-1] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def word_id(self, word):
+        key = word.encode("utf-8")
+        i = self._lower_bound(key, 0, self._count)
+        if i < self._count and self._key(i) == key:
+            return i
+        return -1
+
+    def _rank_key(self, i):
+        return (self._lengths[i], i)
+
+    def _longest_key(self, i):
+        # max(..., key=len) keeps the first of equally long words, i.e. the lowest ID
+        return (-self._lengths[i], i)
+
+    def _prefix_range(self, prefix):
+        lo = self._lower_bound(prefix, 0, self._count)
+        hi = self._lower_bound(_prefix_end(prefix), lo, self._count) if prefix else self._count
+        return lo, hi
+
+    def _cut(self, ids, need):
+        """Head of the ordered ids that holds `need` live words."""
+        used = self._used
+        live = 0
+        for n, i in enumerate(ids):
+            if not used[i]:
+                live += 1
+                if live >= need:
+                    return ids[:n+1]
+        return ids
+
+    def _scan_node(self, lo, hi):
+        extra = self._used[lo:hi].count(1)
+        top = heapq.nsmallest(PREFIX_TOP_K + extra, range(lo, hi), key=self._rank_key)
+        longest = heapq.nsmallest(1 + extra, range(lo, hi), key=self._longest_key)
+        return self._cut(top, PREFIX_TOP_K), self._cut(longest, 1)
+
+    def _build_node(self, prefix, lo, hi):
+        """Build the cached node for prefix and its big children, bottom-up."""
+        if hi - lo <= PREFIX_NODE_MIN:
+            return self._scan_node(lo, hi)
+        depth = len(prefix)
+        tops, longests = [], []
+        i = lo
+        if self._key(i) == prefix:  # the prefix itself sorts first in its range
+            tops.append(i)
+            longests.append(i)
+            i += 1
+        while i < hi:
+            child = self._key(i)[:depth+1]
+            j = self._lower_bound(_prefix_end(child), i, hi)
+            top, longest = self._build_node(child, i, j)
+            tops.extend(top)
+            longests.extend(longest)
+            i = j
+        node = (self._cut(sorted(tops, key=self._rank_key), PREFIX_TOP_K),
+                self._cut(sorted(longests, key=self._longest_key), 1))
+        self._nodes[prefix] = node
+        return node
+
+    def _node_is_short(self, node, lo, hi):
+        used = self._used
+        live_top = sum(1 for i in node[0] if not used[i])
+        live_longest = any(not used[i] for i in node[1])
+        return ((live_top < PREFIX_TOP_K and len(node[0]) < hi - lo)
+                or (not live_longest and len(node[1]) < hi - lo))
+
+    def _build_grams(self, words, order):
+        grams = {}
+        for i in order:
+            for g in _gram_keys(words[i]):
+                posting = grams.get(g)
+                if posting is None:
+                    posting = grams[g] = []
+                posting.append(i)
+        return {g.encode("utf-8"): array('I', posting) for g, posting in grams.items()}
+
+    def _contains_posting(self, letters):
+        """Smallest posting list that holds every word containing letters, and
+        whether all of its words are known to match (no substring check needed)."""
+        if len(letters) == 1:
+            return self._order, False
+        if len(letters) <= 3:
+            return self._grams.get(letters.encode("utf-8"), ()), True
+        trigrams = [letters[i:i+3].encode("utf-8") for i in range(len(letters)-2)]
+        return min((self._grams.get(g, ()) for g in trigrams), key=len), False
+
+    def _rank_posting(self, posting, sub, exact, limit):
+        """
+        Walk a posting list from both ends: the front gives the shortest
+        matches, the back the longest. Postings are already in rank order,
+        so both walks stop as soon as they have their answer.
+        """
+        lengths = self._lengths
+        used = self._used
+        k = max(limit, 1)
+        top = []
+        for i in posting:
+            if not used[i] and (exact or self._has(i, sub)):
+                top.append(i)
+                if len(top) >= k:
+                    break
+        if not top:
+            return None
+        # equally long words come in ID order, keep walking back to the first
+        longest = None
+        for i in reversed(posting):
+            if longest is not None and lengths[i] < lengths[longest]:
+                break
+            if not used[i] and (exact or self._has(i, sub)):
+                longest = i
+        return top, longest
+
+    def _longest_head(self, posting, k):
+        """First k IDs of a rank-ordered posting in longest-first order."""
+        lengths = self._lengths
+        head = []
+        j = len(posting)
+        while j > 0 and len(head) < k:
+            n = lengths[posting[j-1]]
+            end = j
+            while j > 0 and lengths[posting[j-1]] == n:
+                j -= 1
+            head.extend(posting[j:end])
+        return head[:k]
+
+    def _prompt(self, key):
+        entry = self._prompts.get(key)
+        if entry is None:
+            posting = self._grams.get(key)
+            if posting is None:
+                return None
+            if self._prompt_table is not None:
+                slots, starts, ids = self._prompt_table
+                k = 2 * slots[key]
+                entry = (ids[starts[k]:starts[k+1]], ids[starts[k+1]:starts[k+2]])
+            else:
+                entry = (posting[:PROMPT_TOP_K], self._longest_head(posting, PROMPT_LONGEST_K))
+            self._prompts[key] = entry
+        return entry
+
+    def _prompt_matches(self, key, limit):
+        """
+        Answer a 2/3-letter syllable prompt from its precomputed entry. The
+        prompt's cursors move past answers as they get used, so a lookup
+        costs the same however many words contain the syllable; only when an
+        entry runs out does it fall back to walking the posting list.
+        """
+        entry = self._prompt(key)
+        if entry is None:
+            return None
+        short, longest = entry
+        used = self._used
+        # cursors are advanced by remove_ids when it publishes; a lookup
+        # only skips what it finds on its own copy
+        front, back = _advance(entry, used, self._cursors.get(key, (0, 0)))
+        k = max(limit, 1)
+        top = []
+        for n in range(front, len(short)):
+            if not used[short[n]]:
+                top.append(short[n])
+                if len(top) >= k:
+                    break
+        posting = self._grams[key]
+        complete = len(short) == len(posting)
+        if back < len(longest) and (len(top) >= k or complete):
+            return top, longest[back]
+        # the longest head may be shorter than the posting: used up, it only
+        # means the longest live word lies further in
+        if complete and (not top or back == len(longest) == len(posting)):
+            return None
+        return self._rank_posting(posting, key, True, limit)
+
+    def _contains_matches(self, letters, limit):
+        if 2 <= len(letters) <= 3:
+            return self._prompt_matches(letters.encode("utf-8"), limit)
+        posting, exact = self._contains_posting(letters)
+        return self._rank_posting(posting, letters.encode("utf-8"), exact, limit)
+
+    def _scan_range(self, lo, hi, limit):
+        used = self._used
+        live = [i for i in range(lo, hi) if not used[i]]
+        if not live:
+            return None
+        return heapq.nsmallest(limit, live, key=self._rank_key), min(live, key=self._longest_key)
+
+    def _rank_prefix(self, prefix, lo, hi, limit):
+        node = self._nodes.get(prefix)
+        if node is not None:
+            used = self._used
+            top = [i for i in node[0] if not used[i]]
+            longest = next((i for i in node[1] if not used[i]), None)
+            whole = len(node[0]) == hi - lo
+            if longest is None and whole:
+                return None
+            if longest is not None and (len(top) >= limit or whole):
+                return top[:limit], longest
+        return self._scan_range(lo, hi, limit)
+
+    def _prefix_matches(self, prefix, limit):
+        lo, hi = self._prefix_range(prefix)
+        if lo == hi:
+            return None
+        return self._rank_prefix(prefix, lo, hi, limit)
+
+    def _narrow(self, key, start, lo, hi):
+        """
+        Ranges of key[:start], key[:start+1], ... for as long as some word
+        starts with them, given [lo, hi) holds the words starting with
+        key[:start]. The longest valid prefix of key is start + len - 1 chars.
+        """
+        ranges = [(lo, hi)]
+        for d in range(start, len(key)):
+            lo = self._lower_bound(key[:d+1], lo, hi)
+            hi = self._lower_bound(_prefix_end(key[:d+1]), lo, hi)
+            if lo == hi:
+                break
+            ranges.append((lo, hi))
+        return ranges
+
+    def _children(self, depth, lo, hi):
+        """(next byte, lo, hi) for each letter that extends the prefix of length depth."""
+        i = lo
+        while i < hi:
+            key = self._key(i)
+            if len(key) <= depth:
+                i += 1  # the prefix itself is a word
+                continue
+            j = self._lower_bound(_prefix_end(key[:depth+1]), i, hi)
+            yield key[depth], i, j
+            i = j
+
+    def _fuzzy_prefixes(self, key, max_edits, budget=None):
+        """
+        Prefixes of some word within max_edits insertions, deletions,
+        substitutions or adjacent transpositions of key, with their ranges.
+        The sorted list is walked as a trie: edits are applied left to right,
+        and the next one must lie between the previous edit and the first
+        char that no word continues with, so only letters that extend a
+        valid prefix are ever tried. Edits closest to that char are tried
+        first; budget is a one-item list of visits left, shared between
+        calls, and once it runs out the walk stops with what it has found.
+        Counting work rather than time keeps the answer the same under load.
+        """
+        found = {}
+        seen = {}
+        kids = {}  # (depth, lo) -> children, shared by the branches reaching one prefix
+        budget = budget if budget is not None else [math.inf]
+
+        def visit(s, q, lo, hi, edits):
+            # s[:q] is the prefix of the words in [lo, hi) and no edit is due before q
+            if budget[0] <= 0 or seen.get(s, (max_edits + 1, 0)) <= (edits, q):
+                return
+            budget[0] -= 1
+            seen[s] = (edits, q)
+            if edits == max_edits:
+                # no edits left: s must be a prefix as it stands, one bisect tells
+                lo = self._lower_bound(s, lo, hi)
+                if lo < hi and self._key(lo).startswith(s) and edits < found.get(s, (max_edits + 1,))[0]:
+                    found[s] = (edits, lo, self._lower_bound(_prefix_end(s), lo, hi))
+                return
+            ranges = self._narrow(s, q, lo, hi)
+            m = q + len(ranges) - 1
+            if m == len(s):
+                if edits < found.get(s, (max_edits + 1,))[0]:
+                    found[s] = (edits, *ranges[-1])
+                return
+            # a wrong first letter is only corrected when it is the one typo
+            for p in range(m, max(q, edits + 1 < max_edits) - 1, -1):
+                if budget[0] <= 0:
+                    return
+                plo, phi = ranges[p - q]
+                visit(s[:p] + s[p+1:], p, plo, phi, edits + 1)
+                if p + 1 < len(s) and s[p] != s[p+1]:
+                    visit(s[:p] + s[p+1:p+2] + s[p:p+1] + s[p+2:], p, plo, phi, edits + 1)
+                if (p, plo) not in kids:
+                    kids[p, plo] = list(self._children(p, plo, phi))
+                for c, clo, chi in kids[p, plo]:
+                    if budget[0] <= 0:
+                        return
+                    c = bytes((c,))
+                    visit(s[:p] + c + s[p:], p + 1, clo, chi, edits + 1)
+                    if c != s[p:p+1]:
+                        visit(s[:p] + c + s[p+1:], p + 1, clo, chi, edits + 1)
+
+        visit(key, 0, 0, self._count, 0)
+        return found
 
-    def suggest(self, letters, limit=5):
+    def fuzzy(self, letters, limit=5):
+        """
+        Fallback for a buffer nothing starts with or contains, most likely a
+        typo: up to `limit` (word, corrected prefix length) pairs for the
+        nearest prefixes within FUZZY_MAX_EDITS typos (one for buffers of up
+        to FUZZY_SHORT letters), shortest words first. The search gives up
+        after FUZZY_MAX_VISITS edited strings with the corrections found by then.
+        """
+        return self._current._fuzzy(letters, limit)
+
+    def _fuzzy(self, letters, limit):
+        key = (letters or "").encode("utf-8")
+        if not key:
+            return []
+        max_edits = 1 if len(key) <= FUZZY_SHORT else FUZZY_MAX_EDITS
+        budget = [FUZZY_MAX_VISITS]
+        for edits in range(1, max_edits + 1):
+            live = {}
+            for prefix, (cost, lo, hi) in self._fuzzy_prefixes(key, edits, budget).items():
+                match = self._rank_prefix(prefix, lo, hi, limit)
+                if match is not None:
+                    live[prefix] = match[0]
+            matches = []
+            for prefix, top in live.items():
+                # a correction that a longer one extends says less about the word
+                if not any(other != prefix and other.startswith(prefix) for other in live):
+                    matches.extend((self._rank_key(i), i, len(prefix)) for i in top)
+            if matches:
+                return [(self.word(i), n) for _, i, n in heapq.nsmallest(limit, matches)]
+        return []
+
+    def fork(self):
+        """
+        Suggester sharing this one's words and indices but with its own used
+        words, for one daemon session. The prefix node heads stay shared: a
+        head refilled for one session's used words is still a rank-order
+        prefix of its range, so it stays correct for every session.
+        """
+        view = copy.copy(self)
+        view._write_lock = threading.Lock()
+        view._pending = []
+        view._compacting = False
+        view._lock = threading.Lock()
+        view._publish(self._empty, {})
+        return view
+
+    def query_session(self):
+        return QuerySession(self)
+
+    def letter_masks(self):
+        """
+        uint32 letter mask of every word, indexed by ID. Built in one pass of
+        vector operations over the packed blob: every byte becomes its letter
+        bit and the bits are OR-reduced per word.
+        """
+        if self._masks[0] is None:
+            with self._lock:
+                if self._masks[0] is None:
+                    _numpy()
+                    offsets = np.asarray(self._offsets, dtype=np.int64)
+                    base = int(offsets[0])
+                    data = np.frombuffer(self._blob, dtype=np.uint8, count=int(offsets[-1]) - 1 - base, offset=base)
+                    letter = data.astype(np.uint32) - 97  # non-letters wrap around past 25
+                    bits = np.where(letter < 26, np.left_shift(np.uint32(1), letter & 31), np.uint32(0))
+                    self._masks[0] = np.bitwise_or.reduceat(bits.astype(np.uint32), offsets[:-1] - base)
+        return self._masks[0]
+
+    def _coverage_top(self, candidates, sub, exact, remaining, limit):
+        """
+        The `limit` live candidates covering the most letters of the
+        remaining mask, ties broken by the usual (length, ID) rank.
+        candidates is a (lo, hi) ID range or a rank-ordered posting list.
+        Scores come from one vectorized popcount; a histogram of the scores
+        tells which levels hold the answer, and only those are ranked.
+        """
+        masks = self.letter_masks()
+        used = np.frombuffer(self._used, dtype=np.uint8)
+        if isinstance(candidates, tuple):
+            lo, hi = candidates
+            ids = None
+            score = _popcount(masks[lo:hi] & np.uint32(remaining))
+            score += 1
+            score[used[lo:hi] != 0] = 0  # 0 for used words, 1 + covered letters otherwise
+        else:
+            ids = np.asarray(candidates, dtype=np.uint32)
+            score = _popcount(masks[ids] & np.uint32(remaining))
+            score += 1
+            score[used[ids] != 0] = 0
+        counts = np.bincount(score, minlength=28)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint8)
+        top = []
+        for level in range(27, 0, -1):
+            if not counts[level]:
+                continue
+            need = limit - len(top)
+            pos = np.flatnonzero(score == level)
+            if ids is not None:
+                # postings are in rank order already
+                level_ids = ids[pos]
+                if exact:
+                    top.extend(level_ids[:need].tolist())
+                else:
+                    for i in level_ids.tolist():
+                        if self._has(i, sub):
+                            top.append(i)
+                            if len(top) >= limit:
+                                break
+            else:
+                level_ids = pos + lo
+                key = (lengths[level_ids].astype(np.int64) << 32) | level_ids
+                if need < len(key):
+                    key = key[np.argpartition(key, need-1)[:need]]
+                top.extend((np.sort(key) & 0xFFFFFFFF).tolist())
+            if len(top) >= limit:
+                break
+        return top
+
+    def _words(self, ids):
+        return [self.word(i) for i in ids]
+
+    def suggest(self, letters, limit=5, remaining=None):
+        """
+        Up to `limit` words for letters: prefix matches if there are any,
+        otherwise words containing letters. Ranked shortest first, or by
+        the number of letters from the `remaining` mask they cover when one
+        is given; the last slot always holds the longest match.
+        """
+        return self._current._suggest(letters, limit, remaining)
+
+    def _suggest(self, letters, limit, remaining):
         if letters is None:
             letters = ""
         if not letters:
             return [], True
-        results = [w for w in self._list if w.startswith(letters)]
-        prefix_mode = True
-        if not results:
-            results = [w for w in self._list if letters in w]
-            prefix_mode = False
-        results_sorted = sorted(results, key=lambda x: (len(x), x))
-        if results_sorted:
-            longest_word = max(results, key=len)
-            if longest_word not in results_sorted[:limit]:
-                results_sorted = results_sorted[:max(0, limit-1)] + [longest_word]
-            else:
-                results_sorted = results_sorted[:limit]
-        return results_sorted, prefix_mode
+        key = letters.encode("utf-8")
+        match = self._prefix_matches(key, limit)
+        if match is not None:
+            top = match[0]
+            if remaining is not None:
+                top = self._coverage_top(self._prefix_range(key), key, True, remaining, limit)
+            return self._words(_pick_suggestions(top, match[1], limit)), True
+        match = self._contains_matches(letters, limit)
+        if match is not None:
+            top = match[0]
+            if remaining is not None:
+                posting, exact = self._contains_posting(letters)
+                top = self._coverage_top(posting, key, exact, remaining, limit)
+            return self._words(_pick_suggestions(top, match[1], limit)), False
+        return [], False
+
+    def count_matches(self, letters, prefix_mode):
+        """Number of live words starting with (or, in contains mode, containing) letters."""
+        key = letters.encode("utf-8")
+        used = self._current._used
+        if prefix_mode:
+            lo, hi = self._prefix_range(key)
+            return hi - lo - used[lo:hi].count(1)
+        posting, exact = self._contains_posting(letters)
+        return sum(1 for i in posting if not used[i] and (exact or self._has(i, key)))
 
     def remove_word(self, word):
-        word = word.lower()
-        if word in self._set:
-            self._set.remove(word)
-            self._list = sorted(self._set)
-            return True
-        return False
-
-class FireParticle:
-    def __init__(self, x, y, size, color, vx, vy, life, phase):
-        self.x = x
-        self.y = y
-        self.size = size
-        self.color = color
-        self.vx = vx
-        self.vy = vy
-        self.life = life
-        self.phase = phase
+        i = self.word_id(word.lower())
+        if i < 0:
+            return False
+        return self.remove_ids([i]) > 0
+
+    def remove_ids(self, ids):
+        """Mark word IDs as used in bulk, e.g. when replaying a saved game.
+        Returns how many of them were live."""
+        with self._write_lock:
+            base = self._current
+            fresh = [i for i in ids if 0 <= i < self._count and not base._used[i]]
+            if not fresh:
+                return 0
+            used = bytearray(base._used)
+            for i in fresh:
+                used[i] = 1
+            # cursors only skip used entries, more used words keep them valid;
+            # move those of the prompts the new words answer
+            cursors = dict(base._cursors)
+            for i in fresh:
+                for g in _gram_keys(self.word(i)):
+                    key = g.encode("utf-8")
+                    entry = self._prompts.get(key)
+                    if entry is not None:
+                        cursors[key] = _advance(entry, used, cursors.get(key, (0, 0)))
+            self._publish(used, cursors)
+        with self._lock:
+            self._pending.extend(fresh)
+            start = len(self._pending) >= COMPACT_BATCH and not self._compacting
+            if start:
+                self._compacting = True
+        if start:
+            threading.Thread(target=self.compact, daemon=True).start()
+        return len(fresh)
+
+    def restore_word(self, word):
+        i = self.word_id(word.lower())
+        with self._write_lock:
+            base = self._current
+            if i < 0 or not base._used[i]:
+                return False
+            used = bytearray(base._used)
+            used[i] = 0
+            self._publish(used, {})
+        return True
+
+    def reset_round(self):
+        """Make every used word available again, in O(1) time."""
+        with self._write_lock:
+            self._publish(self._empty, {})
+
+    def compact(self):
+        """
+        Refill the prefix nodes whose cached heads have run out of live words,
+        so queries stay on the cached path instead of falling back to scans.
+        Runs on a background thread once COMPACT_BATCH words have been used.
+        """
+        while True:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                if not pending:
+                    self._compacting = False
+                    return
+            snap = self._current
+            for i in pending:
+                key = self._key(i)
+                for d in range(len(key)+1):
+                    prefix = key[:d]
+                    node = self._nodes.get(prefix)
+                    if node is None:
+                        break
+                    lo, hi = self._prefix_range(prefix)
+                    if snap._node_is_short(node, lo, hi):
+                        self._nodes[prefix] = snap._scan_node(lo, hi)
+
+def _dict_layout(sizes):
+    table = []
+    pos = _DICT_HEADER.size + _DICT_SECTION.size * len(sizes)
+    for size in sizes:
+        pos += -pos % 8  # keep array sections aligned
+        table.append((pos, size))
+        pos += size
+    return table
+
+def write_compiled_dictionary(suggester, path, digest):
+    """
+    Write the suggester's word list and indices as one flat file that
+    read_compiled_dictionary can mmap: a packed UTF-8 blob with offset and
+    length arrays, the rank order, the contains postings, the prefix nodes
+    and the prompt answer table. The offsets are file positions, so the mmap itself serves as the blob.
+    """
+    count = len(suggester)
+    blob = b"\n".join(suggester._key(i) for i in range(count))
+    gram_keys = sorted(suggester._grams)
+    gram_starts = array('I', [0])
+    postings = array('I')
+    for g in gram_keys:
+        postings.extend(suggester._grams[g])
+        gram_starts.append(len(postings))
+    prompt_starts = array('I', [0])
+    prompt_ids = array('I')
+    for g in gram_keys:
+        for ids in suggester._prompt(g):
+            prompt_ids.extend(ids)
+            prompt_starts.append(len(prompt_ids))
+    node_keys = list(suggester._nodes)
+    node_starts = array('I', [0])
+    node_ids = array('I')
+    for key in node_keys:
+        for ids in suggester._nodes[key]:
+            node_ids.extend(ids)
+            node_starts.append(len(node_ids))
+    data = [blob, b"", array('B', suggester._lengths).tobytes(),
+            array('I', suggester._order).tobytes(), b"\n".join(gram_keys),
+            gram_starts.tobytes(), postings.tobytes(), b"\n".join(node_keys),
+            node_starts.tobytes(), node_ids.tobytes(), prompt_starts.tobytes(), prompt_ids.tobytes()]
+    table = _dict_layout([4*(count+1) if k == 1 else len(section) for k, section in enumerate(data)])
+    # rebase the offsets onto the blob's position in the file
+    shift = table[0][0] - suggester._offsets[0]
+    data[1] = array('I', [o + shift for o in suggester._offsets]).tobytes()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_DICT_HEADER.pack(DICT_MAGIC, _byteorder_tag(), digest, count, len(data)))
+        for entry in table:
+            f.write(_DICT_SECTION.pack(*entry))
+        for (offset, _), section in zip(table, data):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(section)
+    os.replace(tmp, path)
+
+def _byteorder_tag():
+    return 1234 if sys.byteorder == "little" else 4321
+
+def read_compiled_dictionary(path, digest):
+    """
+    Index tuple for WordSuggester from a compiled dictionary, or None when
+    the file is missing, unreadable or was compiled from a different word
+    list. Words and index arrays stay in the mmap; only the small prefix
+    node table is materialized.
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, tag, file_digest, count, nsections = _DICT_HEADER.unpack_from(mm, 0)
+        if (magic != DICT_MAGIC or tag != _byteorder_tag() or file_digest != digest
+                or nsections != len(DICT_SECTIONS) or count == 0):
+            return None
+        view = memoryview(mm)
+        sec = {}
+        for k, name in enumerate(DICT_SECTIONS):
+            offset, length = _DICT_SECTION.unpack_from(mm, _DICT_HEADER.size + k*_DICT_SECTION.size)
+            sec[name] = view[offset:offset+length]
+        offsets = sec["offsets"].cast("I")
+        lengths = sec["lengths"]
+        order = sec["order"].cast("I")
+        gram_starts = sec["gram_starts"].cast("I")
+        postings = sec["postings"].cast("I")
+        gram_keys = bytes(sec["gram_keys"]).split(b"\n")
+        grams = {g: postings[gram_starts[k]:gram_starts[k+1]] for k, g in enumerate(gram_keys)}
+        prompts = ({g: k for k, g in enumerate(gram_keys)},
+                   sec["prompt_starts"].cast("I"), sec["prompt_ids"].cast("I"))
+        node_starts = sec["node_starts"].cast("I").tolist()
+        node_ids = sec["node_ids"].cast("I").tolist()
+        nodes = {}
+        for k, key in enumerate(bytes(sec["node_keys"]).split(b"\n")):
+            a, b, c = node_starts[2*k:2*k+3]
+            nodes[key] = (node_ids[a:b], node_ids[b:c])
+        if len(offsets) != count + 1 or len(lengths) != count or len(order) != count:
+            return None
+        return mm, offsets, lengths, nodes, order, grams, prompts
+    except (struct.error, ValueError, TypeError, IndexError):
+        return None
+
+def _file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+def load_stages():
+    """
+    Load the dictionary step by step, yielding (stage, suggester) after
+    each one; every stage answers more than the one before, and it is the
+    same suggester throughout. A compiled dictionary (bundled next to the
+    list, or in the user cache dir) matching the list's hash is mmapped in
+    one "mapped" stage. Otherwise the text file is indexed for "prefix"
+    search, then "contains" search, and the result is "compiled" into the
+    cache dir for the next start.
+    """
+    source = find_wordlist()
+    if source is None:
+        words = load_wordlist()
+        suggester = WordSuggester(words)
+        suggester.digest = hashlib.sha1("\n".join(words).encode("utf-8")).digest()
+        yield "built-in", suggester
+        return
+    digest = _file_digest(source)
+    name = Path(source).stem + DICT_SUFFIX
+    cached = os.path.join(_cache_dir(), name)
+    for path in (os.path.join(os.path.dirname(source), name), cached):
+        index = read_compiled_dictionary(path, digest)
+        if index is not None:
+            suggester = WordSuggester(index=index)
+            suggester.digest = digest
+            suggester.path = path
+            yield "mapped", suggester
+            return
+    suggester = WordSuggester(load_wordlist(), defer_contains=True)
+    suggester.digest = digest
+    yield "prefix", suggester
+    suggester.build_contains()
+    yield "contains", suggester
+    try:
+        write_compiled_dictionary(suggester, cached, digest)
+        suggester.path = cached
+    except OSError as e:
+        print("Dictionary cache error:", e, file=sys.stderr)
+        return
+    yield "compiled", suggester
+
+def load_suggester():
+    """WordSuggester for the word list, with every stage of load_stages() done."""
+    for _, suggester in load_stages():
+        pass
+    return suggester
+
+def compile_wordlist():
+    """Offline compiler step: write <wordlist>.wbd next to the word list so it can be bundled."""
+    source = find_wordlist()
+    if source is None:
+        print("No word list found")
+        return
+    start = time.perf_counter()
+    suggester = WordSuggester(load_wordlist())
+    path = os.path.join(os.path.dirname(source), Path(source).stem + DICT_SUFFIX)
+    write_compiled_dictionary(suggester, path, _file_digest(source))
+    print(f"Compiled {len(suggester)} words to {path} in {time.perf_counter()-start:.2f}s")
+
+_query_suggester = None  # per process of the --query pool
+
+def _query_init(path, digest):
+    """Pool initializer: map the compiled dictionary the parent made sure exists,
+    so every worker shares the same page-cache copy of it."""
+    global _query_suggester
+    index = read_compiled_dictionary(path, digest) if path else None
+    _query_suggester = WordSuggester(index=index) if index is not None else load_suggester()
+
+def _query_chunk(prompts, limit, coverage):
+    """JSON lines for a batch of prompts."""
+    sg = _query_suggester
+    lines = []
+    remaining = ALL_LETTERS if coverage else None
+    for prompt in prompts:
+        suggestions, prefix_mode = sg.suggest(prompt, limit, remaining)
+        count = sg.count_matches(prompt, prefix_mode) if suggestions else 0
+        lines.append(json.dumps({
+            "prompt": prompt,
+            "mode": ("prefix" if prefix_mode else "contains") if suggestions else "none",
+            "suggestions": suggestions,
+            "longest": max(suggestions, key=len) if suggestions else None,
+            "count": count,
+        }))
+    return lines
+
+def run_queries(source, out, workers=None, limit=SUGGESTION_COUNT, coverage=False, chunk=QUERY_CHUNK):
+    """
+    Headless bulk mode: answer one prompt per line of `source` and write a
+    JSON line per prompt to `out`, in input order. Batches go to a process
+    pool whose workers all mmap the same compiled dictionary; only a few
+    batches per worker are in flight, so stdin can be streamed. limit is at
+    most PREFIX_TOP_K: prefix nodes cache that many words, beyond it every
+    prefix query would scan its whole range.
+    """
+    if not 1 <= limit <= PREFIX_TOP_K:
+        raise ValueError(f"limit must be between 1 and {PREFIX_TOP_K}")
+    import concurrent.futures  # headless only, kept out of the overlay's startup
+    suggester = load_suggester()
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    total = 0
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_query_init,
+                                                initargs=(suggester.path, suggester.digest)) as pool:
+        in_flight = deque()
+        def drain(keep):
+            while len(in_flight) > keep:
+                out.write("\n".join(in_flight.popleft().result()) + "\n")
+            out.flush()
+        batch = []
+        for line in source:
+            prompt = line.strip().lower()
+            if not prompt:
+                continue
+            batch.append(prompt)
+            if len(batch) >= chunk:
+                in_flight.append(pool.submit(_query_chunk, batch, limit, coverage))
+                total += len(batch)
+                batch = []
+                drain(4 * workers)
+        if batch:
+            in_flight.append(pool.submit(_query_chunk, batch, limit, coverage))
+            total += len(batch)
+        drain(0)
+    elapsed = time.perf_counter() - start
+    print(f"{total} prompts in {elapsed:.2f}s with {workers} workers "
+          f"({total / elapsed if elapsed else 0:.0f}/s)", file=sys.stderr)
+
+def _daemon_address():
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(_cache_dir(), DAEMON_SOCKET)
+    return ("127.0.0.1", DAEMON_PORT)
+
+def _daemon_socket():
+    family = socket.AF_UNIX if hasattr(socket, "AF_UNIX") else socket.AF_INET
+    return socket.socket(family, socket.SOCK_STREAM)
+
+def _serve_daemon_session(suggester, rfile, wfile):
+    """One connection is one session: its own used words over the shared index."""
+    sg = suggester.fork()
+    session = sg.query_session()
+    ops = {
+        "hello": lambda: {"digest": sg.digest.hex() if sg.digest else None, "count": len(sg)},
+        "suggest": lambda letters, limit=SUGGESTION_COUNT, remaining=None:
+            list(session.suggest(letters, limit, remaining)),
+        "fuzzy": lambda letters, limit=SUGGESTION_COUNT: sg.fuzzy(letters, limit),
+        "contains": lambda word: word in sg,
+        "word_id": sg.word_id,
+        "remove_word": sg.remove_word,
+        "restore_word": sg.restore_word,
+        "remove_ids": lambda ids: sg.remove_ids(ids),
+        "reset_round": sg.reset_round,
+    }
+    for line in rfile:
+        request = {}
+        try:
+            request = json.loads(line)
+            reply = {"id": request.get("id"), "result": ops[request["op"]](*request.get("args", ()))}
+        except Exception as e:
+            reply = {"id": request.get("id"), "error": f"{type(e).__name__}: {e}"}
+        wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+def run_daemon():
+    """
+    Serve one in-memory index to every overlay on this machine over a Unix
+    socket in the cache dir (loopback TCP where there are no Unix sockets).
+    Requests are JSON lines answered in order, so clients can pipeline.
+    The socket is bound before the dictionary loads: clients that connect
+    meanwhile wait for their first answer instead of starting another daemon.
+    """
+    import socketserver  # headless only, kept out of the overlay's startup
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            _serve_daemon_session(self.server.suggester, self.rfile, self.wfile)
+
+    address = _daemon_address()
+    if isinstance(address, str):
+        if os.path.exists(address):
+            try:
+                with _daemon_socket() as probe:
+                    probe.connect(address)
+                print("A suggestion daemon is already running at", address)
+                return
+            except OSError:
+                os.unlink(address)  # left behind by a daemon that died
+        os.makedirs(os.path.dirname(address), exist_ok=True)
+        server = socketserver.ThreadingUnixStreamServer(address, Handler)
+    else:
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer(address, Handler)
+    server.daemon_threads = True
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # still clean up the socket
+    try:
+        suggester = load_suggester()
+        suggester.letter_masks()  # build once, so every session shares them
+        server.suggester = suggester
+        print(f"Suggestion daemon serving {len(suggester)} words at {address}")
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+
+class DaemonClient:
+    """
+    Stand-in for WordSuggester that forwards to the suggestion daemon.
+    Calls from any thread share one connection: each request carries an ID
+    and a reader thread hands replies to the waiting futures, so requests
+    are pipelined instead of taking turns. suggest and membership answers
+    go through a small LRU that any change to the used words clears.
+
+    If the daemon dies or stops answering, the client loads the dictionary
+    itself, replays this session's changes on it and answers from there.
+    """
+    def __init__(self, sock, timeout=DAEMON_TIMEOUT):
+        # timeout: for the first answer, which a starting daemon only gives once loaded
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._waiting = {}
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.version = 0
+        self.path = None
+        self.contains_ready = True  # the daemon only serves a fully loaded index
+        self._changes = []  # (op, args) the daemon applied since the last new round
+        self._local = None  # WordSuggester loaded here once the daemon is gone
+        # a change and the fallback that replays _changes don't interleave;
+        # reentrant because a change may be the call that falls back
+        self._change_lock = threading.RLock()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        hello = self.submit("hello").result(timeout)
+        self.digest = bytes.fromhex(hello["digest"]) if hello["digest"] else None
+        self._count = hello["count"]
+
+    def _read_loop(self):
+        try:
+            for line in self._reader:
+                reply = json.loads(line)
+                future = self._waiting.pop(reply["id"], None)
+                if future is None:
+                    continue
+                if "error" in reply:
+                    future.set_exception(RuntimeError(reply["error"]))
+                else:
+                    future.set_result(reply["result"])
+        except (OSError, ValueError):
+            pass
+        for future in list(self._waiting.values()):
+            future.set_exception(ConnectionError("suggestion daemon went away"))
+        self._waiting.clear()
+
+    def submit(self, op, *args):
+        """Send a request without waiting; returns a Future for its result."""
+        from concurrent.futures import Future
+        future = Future()
+        with self._send_lock:
+            request_id = next(self._ids)
+            self._waiting[request_id] = future
+            self._sock.sendall(json.dumps({"id": request_id, "op": op, "args": args}).encode("utf-8") + b"\n")
+        return future
+
+    def _call(self, op, *args):
+        from concurrent.futures import TimeoutError as ReplyTimeout  # not a TimeoutError before 3.11
+        if self._local is None:
+            try:
+                return self.submit(op, *args).result(DAEMON_TIMEOUT)
+            except (OSError, TimeoutError, ReplyTimeout) as e:
+                self._fall_back(e)
+        if op == "contains":
+            return args[0] in self._local
+        return getattr(self._local, op)(*args)
+
+    def _fall_back(self, error):
+        with self._change_lock:
+            if self._local is not None:
+                return
+            print(f"Suggestion daemon unavailable ({type(error).__name__}), loading the dictionary here")
+            local = load_suggester()
+            for op, args in list(self._changes):
+                getattr(local, op)(*args)
+            self.path = local.path
+            self._local = local
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)  # ends the reader, in case the daemon hangs
+            except OSError:
+                pass
+        self._changed()
+
+    def _change(self, op, *args):
+        with self._change_lock:
+            result = self._call(op, *args)
+            if self._local is None:
+                # only what the daemon acknowledged: a change that fell back
+                # was applied to the local suggester by _call itself
+                if op == "reset_round":
+                    self._changes.clear()
+                self._changes.append((op, args))
+        self._changed()
+        return result
+
+    def _cached(self, key, op, *args):
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            version = self.version
+        result = self._call(op, *args)
+        with self._cache_lock:
+            if version == self.version:  # don't cache an answer from before a change
+                self._cache[key] = result
+                if len(self._cache) > DAEMON_LRU:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _changed(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self.version += 1
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        return self._cached(("contains", word), "contains", word)
+
+    def suggest(self, letters, limit=5, remaining=None):
+        if not letters:
+            return [], True
+        suggestions, prefix_mode = self._cached(("suggest", letters, limit, remaining),
+                                                "suggest", letters, limit, remaining)
+        return suggestions, prefix_mode
+
+    def fuzzy(self, letters, limit=5):
+        if not letters:
+            return []
+        return [tuple(pair) for pair in self._cached(("fuzzy", letters, limit), "fuzzy", letters, limit)]
+
+    def word_id(self, word):
+        return self._call("word_id", word)
+
+    def remove_word(self, word):
+        return self._change("remove_word", word)
+
+    def restore_word(self, word):
+        return self._change("restore_word", word)
+
+    def remove_ids(self, ids):
+        return self._change("remove_ids", list(ids))
+
+    def reset_round(self):
+        self._change("reset_round")
+
+    def query_session(self):
+        # the daemon keeps the incremental QuerySession for this connection
+        return self
+
+    def reset(self):
+        pass
+
+def connect_daemon(spawn=True):
+    """
+    Client for the machine's suggestion daemon, starting one in the
+    background if none is running. Returns None when it can't be reached.
+    A daemon that is still loading is waited for (DAEMON_START_TIMEOUT), and
+    so is a spawned one until it binds its socket or exits.
+    """
+    from concurrent.futures import TimeoutError as ReplyTimeout  # not a TimeoutError before 3.11
+
+    def connect():
+        sock = _daemon_socket()
+        try:
+            sock.connect(_daemon_address())
+            return DaemonClient(sock, DAEMON_START_TIMEOUT)
+        except (OSError, TimeoutError, ReplyTimeout):
+            sock.close()
+            return None
+    client = connect()
+    if client is not None or not spawn:
+        return client
+    command = [sys.executable] + ([] if getattr(sys, "frozen", False) else [os.path.abspath(__file__)]) + ["--daemon"]
+    options = {"creationflags": subprocess.DETACHED_PROCESS} if sys.platform == "win32" else {"start_new_session": True}
+    daemon = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, **options)
+    # it binds before loading, so this only waits for the interpreter to start
+    deadline = time.perf_counter() + DAEMON_START_TIMEOUT
+    while time.perf_counter() < deadline:
+        time.sleep(0.05)
+        client = connect()
+        if client is not None:
+            return client
+        if daemon.poll() is not None:
+            return connect()  # it exited: another daemon won the race, or it failed
+    return None
+
+class GameJournal:
+    """
+    Append-only binary log of the current game, so used words and the high
+    score survive a restart. Records are fixed-size (type, value) pairs after
+    a header naming the word list they belong to; word IDs are only valid for
+    that list, so a log of another list only hands on the high score and the
+    number of games played. ENTER only appends to an in-memory buffer, a background thread
+    writes and fsyncs it in batches. new_game() truncates the log, keeping the
+    high score and the number of games played.
+    """
+    USED, RESTORED, HIGH_SCORE, GAMES = 1, 2, 3, 4
+
+    def __init__(self, path, digest):
+        self.path = path
+        self.digest = digest
+        self.high_score = 0
+        self.games = 0
+        self.used = set()
+        self._buffer = bytearray()
+        self._lock = threading.Lock()     # guards _buffer
+        self._io_lock = threading.Lock()  # guards the file
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = None
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def replay(self, suggester):
+        """Load the log into suggester's used set and open it for appending."""
+        log = self._read()
+        if log is None:
+            self._rewrite()
+            return
+        digest, records = log
+        same_list = digest == self.digest
+        for kind, value in records:
+            if kind == self.USED and same_list:
+                self.used.add(value)
+            elif kind == self.RESTORED and same_list:
+                self.used.discard(value)
+            elif kind == self.HIGH_SCORE:
+                self.high_score = max(self.high_score, value)
+            elif kind == self.GAMES:
+                self.games = value
+        if not same_list:
+            self._rewrite()  # the word IDs were for another list: start its game over
+            return
+        suggester.remove_ids(sorted(self.used))
+        if len(records) > len(self.used) + JOURNAL_SLACK:
+            self._rewrite()  # compact: drop restored words and old high scores
+        else:
+            self._open()
+
+    def _read(self):
+        """(word list digest, records) of the journal, or None if there is none."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < _JOURNAL_HEADER.size:
+            return None
+        magic, digest = _JOURNAL_HEADER.unpack_from(data)
+        if magic != JOURNAL_MAGIC:
+            return None
+        end = len(data) - (len(data) - _JOURNAL_HEADER.size) % _JOURNAL_RECORD.size
+        if end != len(data):
+            # a record torn by a crash: drop it before appending again
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        return digest, list(_JOURNAL_RECORD.iter_unpack(data[_JOURNAL_HEADER.size:end]))
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+
+    def _rewrite(self):
+        """Replace the log with the current state, written to a temp file first."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_JOURNAL_HEADER.pack(JOURNAL_MAGIC, self.digest))
+            f.write(_JOURNAL_RECORD.pack(self.HIGH_SCORE, self.high_score))
+            f.write(_JOURNAL_RECORD.pack(self.GAMES, self.games))
+            for i in sorted(self.used):
+                f.write(_JOURNAL_RECORD.pack(self.USED, i))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._open()
+
+    def _append(self, kind, value):
+        with self._lock:
+            self._buffer += _JOURNAL_RECORD.pack(kind, value)
+        self._wake.set()
+
+    def word_used(self, word_id):
+        self.used.add(word_id)
+        self._append(self.USED, word_id)
+
+    def word_restored(self, word_id):
+        self.used.discard(word_id)
+        self._append(self.RESTORED, word_id)
+
+    def set_high_score(self, score):
+        if score > self.high_score:
+            self.high_score = score
+            self._append(self.HIGH_SCORE, score)
+
+    def new_game(self):
+        with self._io_lock:
+            with self._lock:
+                self._buffer = bytearray()
+            self.used = set()
+            self.games += 1
+            try:
+                self._rewrite()
+            except OSError as e:
+                print("Journal error:", e)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            time.sleep(JOURNAL_FLUSH_MS / 1000)  # batch records that arrive close together
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                data, self._buffer = self._buffer, bytearray()
+            if not data or self._file is None:
+                return
+            try:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                print("Journal error:", e)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class QuerySession:
+    """
+    Incremental suggestion state for the typed buffer. Every typed character
+    narrows the candidates of the previous one (a sub-range of the sorted
+    list in prefix mode, a filtered posting list in contains mode) and pushes
+    them on a stack, BACKSPACE pops back to the earlier candidates. The stack
+    starts over whenever the suggester's live words change.
+    """
+    def __init__(self, suggester):
+        self.suggester = suggester
+        self.reset()
+
+    @property
+    def buffer(self):
+        return self._stack[-1][0]
+
+    def reset(self):
+        # levels are (letters, lo, hi, posting, exact): posting is None while
+        # prefix matches exist, otherwise a superset of the words containing
+        # letters, with exact set once it has been filtered down to them
+        self._snap = self.suggester.snapshot()
+        self._version = self._snap.version
+        self._stack = [("", 0, len(self.suggester), None, True)]
+
+    def push(self, ch):
+        sg = self._snap
+        letters, lo, hi, posting, exact = self._stack[-1]
+        letters += ch
+        key = letters.encode("utf-8")
+        if posting is None:
+            lo = sg._lower_bound(key, lo, hi)
+            hi = sg._lower_bound(_prefix_end(key), lo, hi)
+            if lo < hi and sg._rank_prefix(key, lo, hi, 1) is not None:
+                self._stack.append((letters, lo, hi, None, True))
+                return
+            # first level without prefix matches: the index posting is enough
+            posting, exact = sg._contains_posting(letters)
+        else:
+            fresh, exact = sg._contains_posting(letters)
+            if exact or len(fresh) < len(posting):
+                posting = fresh
+            if not exact:
+                posting = [i for i in posting if sg._has(i, key)]
+                exact = True
+        self._stack.append((letters, lo, hi, posting, exact))
+
+    def pop(self):
+        if len(self._stack) > 1:
+            self._stack.pop()
+
+    def _seek(self, letters):
+        if self._version != self.suggester.version:
+            self.reset()  # the stack was narrowed with an older generation's live words
+        while not letters.startswith(self.buffer):
+            self.pop()
+        for ch in letters[len(self.buffer):]:
+            self.push(ch)
+
+    def suggest(self, letters, limit=5, remaining=None):
+        """Same results as WordSuggester.suggest, reusing the narrowed candidates."""
+        self._seek(letters or "")
+        letters, lo, hi, posting, exact = self._stack[-1]
+        if not letters:
+            return [], True
+        sg = self._snap
+        key = letters.encode("utf-8")
+        if posting is None:
+            match = sg._rank_prefix(key, lo, hi, limit)
+            top = match[0]
+            if remaining is not None:
+                top = sg._coverage_top((lo, hi), key, True, remaining, limit)
+            return sg._words(_pick_suggestions(top, match[1], limit)), True
+        if 2 <= len(letters) <= 3 and exact:
+            match = sg._prompt_matches(key, limit)
+        else:
+            match = sg._rank_posting(posting, key, exact, limit)
+        if match is None:
+            return [], False
+        top = match[0]
+        if remaining is not None:
+            top = sg._coverage_top(posting, key, exact, remaining, limit)
+        return sg._words(_pick_suggestions(top, match[1], limit)), False
+
+    def fuzzy(self, letters, limit=5):
+        return self._snap._fuzzy(letters, limit)
+
+class SuggestionWorker(QtCore.QObject):
+    """
+    Computes suggestions on a background thread with its own QuerySession.
+    A request overwrites the single pending slot, so under fast typing only
+    the newest buffer is computed; each result carries the generation of its
+    request so the overlay can drop answers for buffers it has moved past.
+    When nothing matches, the result carries typo corrections instead.
+
+    Submitted words and new rounds are applied here too, in order and before
+    the next suggestions, so the GUI never waits on the suggester (which may
+    be a daemon a socket away).
+    """
+    ready = QtCore.pyqtSignal(int, str, list, bool, list, bool)  # ..., prefix_mode, corrections, is_word
+    submitted = QtCore.pyqtSignal(str, bool, int)  # word, is a word, its ID if it was still live else -1
+    round_reset = QtCore.pyqtSignal()
+
+    def __init__(self, suggester=None, limit=SUGGESTION_COUNT, tracer=None):
+        super().__init__()
+        self.suggester = None
+        self.session = None  # requests are dropped until there is a suggester
+        self.limit = limit
+        self.tracer = tracer
+        self.generation = 0
+        self._pending = None  # (generation, letters, reset, remaining)
+        self._changes = []  # ("submit", word) or ("new_round", None), applied in order
+        self._cond = threading.Condition()
+        if suggester is not None:
+            self.set_suggester(suggester)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def set_suggester(self, suggester):
+        with self._cond:
+            self.suggester = suggester
+            self.session = suggester.query_session()
+
+    def request(self, letters, reset=False, remaining=None):
+        """remaining: letter mask to rank by coverage, or None for the default ranking."""
+        with self._cond:
+            self.generation += 1
+            if self._pending is not None:
+                reset = reset or self._pending[2]  # don't lose a reset that was skipped
+            self._pending = (self.generation, letters, reset, remaining)
+            self._cond.notify()
+            return self.generation
+
+    def submit(self, word):
+        """Mark word used if it is one; the answer comes back through submitted."""
+        with self._cond:
+            self._changes.append(("submit", word))
+            self._cond.notify()
+
+    def new_round(self):
+        """Make every used word available again; round_reset reports it done."""
+        with self._cond:
+            self._changes.append(("new_round", None))
+            self._cond.notify()
+
+    def _apply(self, suggester, op, word):
+        if op == "new_round":
+            suggester.reset_round()
+            self.round_reset.emit()
+            return
+        valid = word in suggester
+        removed = valid and suggester.remove_word(word)
+        self.submitted.emit(word, valid, suggester.word_id(word) if removed else -1)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._changes:
+                    self._cond.wait()
+                changes, self._changes = self._changes, []
+                pending, self._pending = self._pending, None
+                suggester, session = self.suggester, self.session
+            for op, word in changes:
+                try:
+                    self._apply(suggester, op, word)
+                except Exception as e:
+                    print("Suggester update error:", e)
+            if session is None or pending is None:
+                continue
+            generation, letters, reset, remaining = pending
+            try:
+                start = time.perf_counter()
+                if reset:
+                    session.reset()
+                suggestions, prefix_mode = session.suggest(letters, self.limit, remaining)
+                corrections = []
+                # without the contains index yet, "nothing matches" may not be a typo
+                if not suggestions and letters and suggester.contains_ready and generation == self.generation:
+                    corrections = session.fuzzy(letters, self.limit)
+                is_word = bool(letters) and letters in suggester
+            except Exception as e:
+                print("Suggestion error:", e)
+                continue
+            if self.tracer is not None:
+                self.tracer.suggested(generation, start, time.perf_counter())
+            if generation == self.generation:
+                self.ready.emit(generation, letters, suggestions, prefix_mode, corrections, is_word)
+
+class DictionaryLoader(QtCore.QObject):
+    """
+    Runs a sequence of (stage, suggester) loading steps, such as
+    load_stages(), on a background thread and reports each one with the
+    seconds it took, so the overlay can start answering after the first.
+    """
+    stage = QtCore.pyqtSignal(object, str, float)  # suggester, stage, seconds
+    finished = QtCore.pyqtSignal(float)            # total seconds
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, stages):
+        super().__init__()
+        self.stages = stages  # callable returning the stage iterator
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        start = last = time.perf_counter()
+        try:
+            for name, suggester in self.stages():
+                now = time.perf_counter()
+                self.stage.emit(suggester, name, now - last)
+                last = now
+        except Exception as e:
+            print("Dictionary load error:", e)
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(time.perf_counter() - start)
+
+class LatencyTracer:
+    """
+    Timestamps every keystroke through the pipeline: the pynput callback,
+    update_signal delivery, suggest() on the worker, building the suggestion
+    HTML and the next GlowFrame paint. The last TRACE_CAPACITY keystrokes are
+    kept in a fixed-size ring buffer, so the percentiles of each stage show
+    whether lag came from event delivery, lookup or rendering.
+    """
+    STAGES = ("key", "signal", "suggest_start", "suggest_end", "render_start", "render_end", "paint")
+    KEY, SIGNAL, SUGGEST_START, SUGGEST_END, RENDER_START, RENDER_END, PAINT = range(7)
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity * len(self.STAGES)))  # 0.0 = not reached
+        self.keys = [""] * capacity
+        self.count = 0
+        self._slots = {}  # suggestion generation -> ring slot
+        self._unpainted = []
+
+    def _mark(self, slot, stage, t=None):
+        self.times[slot*len(self.STAGES) + stage] = time.perf_counter() if t is None else t
+
+    def start(self, key_char, pressed=0.0):
+        """New record for a key arriving through update_signal, pressed at the
+        given perf_counter() time (0.0 when not from the listener); returns its slot."""
+        slot = self.count % self.capacity
+        self.count += 1
+        n = len(self.STAGES)
+        self.times[slot*n:slot*n+n] = array('d', bytes(8*n))
+        self.keys[slot] = key_char
+        if pressed:
+            self._mark(slot, self.KEY, pressed)
+        self._mark(slot, self.SIGNAL)
+        return slot
+
+    def link(self, generation, slot):
+        self._slots[generation] = slot
+        if len(self._slots) > self.capacity:
+            del self._slots[next(iter(self._slots))]
+
+    def suggested(self, generation, start, end):
+        slot = self._slots.get(generation)
+        if slot is not None:
+            self._mark(slot, self.SUGGEST_START, start)
+            self._mark(slot, self.SUGGEST_END, end)
+
+    def render_start(self, generation):
+        slot = self._slots.pop(generation, None)
+        if slot is not None:
+            self._mark(slot, self.RENDER_START)
+        return slot
+
+    def render_end(self, slot):
+        if slot is not None:
+            self._mark(slot, self.RENDER_END)
+            self._unpainted.append(slot)
+
+    def painted(self):
+        if self._unpainted:
+            t = time.perf_counter()
+            for slot in self._unpainted:
+                self._mark(slot, self.PAINT, t)
+            self._unpainted = []
+
+    def records(self):
+        n = len(self.STAGES)
+        first = max(0, self.count - self.capacity)
+        for k in range(first, self.count):
+            slot = k % self.capacity
+            yield self.keys[slot], self.times[slot*n:slot*n+n]
+
+    def gaps(self):
+        """Stage durations in ms per keystroke, for the stages each one reached."""
+        out = {"deliver": [], "queue": [], "suggest": [], "render": [], "paint": [], "total": []}
+        for _, t in self.records():
+            def gap(name, a, b):
+                if t[a] and t[b]:
+                    out[name].append((t[b] - t[a]) * 1000)
+            gap("deliver", self.KEY, self.SIGNAL)
+            gap("queue", self.SIGNAL, self.SUGGEST_START)
+            gap("suggest", self.SUGGEST_START, self.SUGGEST_END)
+            gap("render", self.RENDER_START, self.RENDER_END)
+            gap("paint", self.RENDER_END, self.PAINT)
+            gap("total", self.KEY if t[self.KEY] else self.SIGNAL, self.PAINT)
+        return out
+
+    def summary(self):
+        parts = []
+        for name, values in self.gaps().items():
+            if values:
+                values.sort()
+                p50 = values[len(values)//2]
+                p95 = values[min(len(values)-1, int(len(values)*0.95))]
+                parts.append(f"{name} {p50:.1f}/{p95:.1f}")
+        return "p50/p95 ms: " + (" ".join(parts) if parts else "no keys yet")
+
+    def dump(self, path):
+        records = []
+        for key, t in self.records():
+            origin = t[self.KEY] or t[self.SIGNAL]
+            records.append({"char": key, **{stage: round((v - origin) * 1000, 3) if v else None
+                                           for stage, v in zip(self.STAGES, t)}})
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=1)
+
+class KeystrokeTyper:
+    """
+    Types autocomplete words as real keystrokes from one driver thread. A
+    run's delays are all drawn when it starts and turned into deadlines from
+    its start time, so a key sent late doesn't push back the rest of the
+    word. The thread sleeps on the run's cancel event until TYPER_SPIN_MS
+    before each deadline and spins on perf_counter for the rest, which keeps
+    key gaps on the planned distribution while the GUI thread is busy.
+    Planned and achieved gaps of the last TRACE_CAPACITY keys are kept for
+    gap_stats().
+    """
+    def __init__(self, press, release, on_key=None, on_done=None,
+                 mean_ms=100.0, sd_ms=50.0, min_ms=40, max_ms=300, key_down_ms=8, rng=None):
+        self.press = press
+        self.release = release
+        self.on_key = on_key    # called with each char once it was pressed
+        self.on_done = on_done  # called with the run ID once a run finished or was cancelled
+        self.mean_ms, self.sd_ms = mean_ms, sd_ms
+        self.min_ms, self.max_ms = min_ms, max_ms
+        self.key_down_ms = key_down_ms
+        self.rng = rng or random.Random()
+        self.planned = deque(maxlen=TRACE_CAPACITY)   # ms between consecutive presses
+        self.achieved = deque(maxlen=TRACE_CAPACITY)
+        self._runs = itertools.count(1)
+        self._cancel = threading.Event()
+        self._pending = None  # (run ID, chars, delays in ms, cancel event)
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def plan(self, n):
+        """n gaussian key delays in ms, clamped to [min_ms, max_ms]."""
+        return [int(max(self.min_ms, min(self.max_ms, self.rng.gauss(self.mean_ms, self.sd_ms))))
+                for _ in range(n)]
+
+    def start(self, chars):
+        """Type chars, cancelling any run still in progress; returns the run ID."""
+        with self._cond:
+            self._cancel.set()
+            self._cancel = threading.Event()
+            run = next(self._runs)
+            self._pending = (run, chars, self.plan(len(chars)), self._cancel)
+            self._cond.notify()
+            return run
+
+    def cancel(self):
+        """Stop the current run before its next key."""
+        self._cancel.set()
+
+    def _wait_until(self, deadline, cancel):
+        """Sleep, then spin, until deadline; False if cancelled first."""
+        coarse = deadline - time.perf_counter() - TYPER_SPIN_MS / 1000
+        if coarse > 0 and cancel.wait(coarse):
+            return False
+        while time.perf_counter() < deadline:  # keeps the GIL, handing it back costs a switch interval
+            if cancel.is_set():
+                return False
+        return not cancel.is_set()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                run, chars, delays, cancel = self._pending
+                self._pending = None
+            last = deadline = time.perf_counter()
+            for ch, delay in zip(chars, delays):
+                deadline += delay / 1000
+                if not self._wait_until(deadline, cancel):
+                    break
+                sent = time.perf_counter()
+                self.planned.append(delay)
+                self.achieved.append((sent - last) * 1000)
+                last = sent
+                try:
+                    self.press(ch)
+                    time.sleep(self.key_down_ms / 1000)
+                    self.release(ch)
+                except Exception as e:
+                    print("Controller send error:", e)
+                if self.on_key is not None:
+                    self.on_key(ch)
+            else:
+                self._wait_until(time.perf_counter() + TYPER_GRACE_MS / 1000, cancel)
+            if self.on_done is not None:
+                self.on_done(run)
+
+    def gap_stats(self):
+        """
+        Planned vs achieved key gaps in ms: mean and standard deviation of
+        each, and percentiles of the absolute error per key.
+        """
+        planned, achieved = list(self.planned), list(self.achieved)
+        if not planned:
+            return {"n": 0}
+        def mean_sd(values):
+            m = sum(values) / len(values)
+            return m, math.sqrt(sum((v - m) ** 2 for v in values) / len(values))
+        errors = sorted(abs(a - p) for p, a in zip(planned, achieved))
+        pick = lambda q: errors[min(len(errors)-1, int(q*len(errors)))]
+        (pm, psd), (am, asd) = mean_sd(planned), mean_sd(achieved)
+        return {"n": len(errors), "planned_mean": pm, "planned_sd": psd,
+                "achieved_mean": am, "achieved_sd": asd,
+                "error_p50": pick(0.50), "error_p95": pick(0.95), "error_max": errors[-1]}
+
+class ParticlePool:
+    """
+    Fixed-capacity struct-of-arrays particle storage. Each attribute is a
+    NumPy array indexed by slot and `alive` marks the occupied slots, so a
+    frame update or a spawn is a handful of vector operations instead of a
+    Python loop over particle objects. The arrays (and NumPy itself) are only
+    set up by the first free_slots(), so a window without fire never loads it.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.rng = None
+        self.alive = None
+        self.count = 0
+
+    def _allocate(self):
+        capacity = self.capacity
+        self.rng = _numpy().random.default_rng()
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.phase = np.zeros(capacity)
+        self.alpha = np.zeros(capacity, dtype=np.int16)
+        self.life = np.zeros(capacity, dtype=np.int16)
+        self.rgb = np.zeros((capacity, 3), dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def free_slots(self, n):
+        """Up to n unoccupied slots."""
+        if self.alive is None:
+            self._allocate()
+        return np.flatnonzero(~self.alive)[:n]
+
+    def spawn(self, slots, x, y, size, rgb, alpha, vx, vy, life):
+        self.x[slots] = x
+        self.y[slots] = y
+        self.size[slots] = size
+        self.rgb[slots] = rgb
+        self.alpha[slots] = alpha
+        self.vx[slots] = vx
+        self.vy[slots] = vy
+        self.life[slots] = life
+        self.phase[slots] = self.rng.uniform(0, 2*math.pi, len(slots))
+        self.alive[slots] = True
+        self.count += len(slots)
+
+    def step(self, sway_x, sway_y, size_jitter):
+        if not self.count:
+            return
+        live = np.flatnonzero(self.alive)
+        n = len(live)
+        phase = self.phase[live] + 0.1
+        self.phase[live] = phase
+        self.x[live] += np.sin(phase)*sway_x + self.vx[live]
+        self.y[live] += np.cos(phase)*sway_y + self.vy[live]
+        self.size[live] = np.maximum(4, self.size[live] + self.rng.uniform(-size_jitter, size_jitter, n))
+        self.alpha[live] = np.clip(self.alpha[live] + self.rng.integers(-15, 16, n), 20, 255)
+        life = self.life[live] - 1
+        self.life[live] = life
+        dead = live[life <= 0]
+        self.alive[dead] = False
+        self.count -= len(dead)
+
+    def bounds(self):
+        """QRect covering every live particle as drawn, or None."""
+        if not self.count:
+            return None
+        live = self.alive
+        x = self.x[live].astype(int)
+        y = self.y[live].astype(int)
+        size = self.size[live].astype(int)
+        x0, y0 = int(x.min()) - 1, int(y.min()) - 1
+        return QtCore.QRect(x0, y0, int((x + size).max()) + 2 - x0, int((y + size).max()) + 2 - y0)
+
+    def draw(self, painter, clip=None):
+        if not self.count:
+            return
+        visible = self.alive
+        if clip is not None:
+            # skip particles outside the repainted area
+            x, y, size = self.x.astype(int), self.y.astype(int), self.size.astype(int)
+            visible = (visible & (x <= clip.right()) & (x + size >= clip.left())
+                       & (y <= clip.bottom()) & (y + size >= clip.top()))
+        live = np.flatnonzero(visible)
+        painter.setPen(QtCore.Qt.NoPen)
+        color = QtGui.QColor()
+        for x, y, size, (r, g, b), a in zip(self.x[live].astype(int).tolist(), self.y[live].astype(int).tolist(),
+                                            self.size[live].astype(int).tolist(), self.rgb[live].tolist(),
+                                            self.alpha[live].tolist()):
+            color.setRgb(r, g, b, a)
+            painter.setBrush(color)
+            painter.drawEllipse(x, y, size, size)
 
 class GlowFrame(QtWidgets.QFrame):
     def __init__(self, parent=None):
@@ -87,62 +2027,143 @@ class GlowFrame(QtWidgets.QFrame):
         self.contains_mode = False
         self.word_length = 0
         self.ready_for_fire = False
-        self.particles = []
-        self.extra_effects = []
+        self.particles = ParticlePool(MAX_PARTICLES)
+        self.extra_effects = ParticlePool(MAX_EXTRA_EFFECTS)
         self.fast_phase = 0.0
+        self.on_paint = None  # called after every paint, for latency tracing
+        # the timer only runs while something moves; set_* calls wake it up
+        self.frame_ms = FRAME_MS
+        self.animate_idle = False  # keep the border rotating when nothing else moves
+        self.last_frame = None
+        # pre-rendered layers, rebuilt when the size or pixel ratio changes
+        self._layer_key = None
+        self._background = None
+        self._borders = {}
+        self._border_region = QtGui.QRegion()
+        self._particle_rect = QtCore.QRect()
         self.timer = QtCore.QTimer(self)
         self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
+        self.wake()
 
     def set_glow(self, active: bool):
-        self.glow_active = active
+        if active != self.glow_active:
+            self.glow_active = active
+            self.wake()
+
+    def set_word_length(self, length):
+        if length != self.word_length:
+            self.word_length = length
+            self.wake()
+
+    def set_mode(self, contains_mode, ready_for_fire):
+        if (contains_mode, ready_for_fire) != (self.contains_mode, self.ready_for_fire):
+            self.contains_mode = contains_mode
+            self.ready_for_fire = ready_for_fire
+            self.wake()
+
+    def set_frame_rate(self, fps=None, low_power=False, animate_idle=False):
+        """Cap the frame rate (or drop to LOW_POWER_FRAME_MS) and choose whether
+        the border keeps rotating while the overlay is otherwise static."""
+        self.frame_ms = LOW_POWER_FRAME_MS if low_power else FRAME_MS
+        if fps:
+            self.frame_ms = max(self.frame_ms, int(1000 / fps))
+        self.animate_idle = animate_idle
+        if self.timer.isActive():
+            self.timer.start(self.frame_ms)
+        self.wake()
+
+    def wake(self):
+        if not self.timer.isActive() and self.isVisible():
+            self.last_frame = None
+            self.timer.start(self.frame_ms)
+        self.update()
+
+    def is_idle(self):
+        return (not self.animate_idle
+                and not self.particles and not self.extra_effects
+                and not (self.ready_for_fire and self.word_length >= 10)
+                and self.glow_alpha == (1.0 if self.glow_active else 0.0))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.wake()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
 
     def spawn_particles(self):
         if self.ready_for_fire and self.word_length >= 10:
-            num_new = min(self.word_length-9, MAX_PARTICLES - len(self.particles))
-            for _ in range(num_new):
-                x = random.randint(20, OVERLAY_WIDTH-20)
-                y = OVERLAY_HEIGHT - random.randint(0,15)
-                size = random.randint(6,12)
-                t = min(self.word_length, MAX_PARTICLES)/MAX_PARTICLES
-                if self.glow_active:
-                    color = QtGui.QColor(0,255,200,random.randint(80,150))
-                else:
-                    r = int(50 + t*205)
-                    g = int(50 + t*150)
-                    b = int(200 - t*150)
-                    color = QtGui.QColor(r,g,b,random.randint(80,150))
-                vx = random.uniform(-0.5,0.5)
-                vy = random.uniform(-3,-1)
-                life = random.randint(40,70)
-                phase = random.uniform(0,2*math.pi)
-                self.particles.append(FireParticle(x,y,size,color,vx,vy,life,phase))
+            slots = self.particles.free_slots(self.word_length-9)
+            n = len(slots)
+            if not n:
+                return
+            rng = self.particles.rng
+            if self.glow_active:
+                rgb = (0, 255, 200)
+            else:
+                t = min(self.word_length, FIRE_COLOR_SPAN)/FIRE_COLOR_SPAN
+                rgb = (int(50 + t*205), int(50 + t*150), int(200 - t*150))
+            self.particles.spawn(slots,
+                                 x=rng.integers(20, OVERLAY_WIDTH-20, n, endpoint=True),
+                                 y=OVERLAY_HEIGHT - rng.integers(0, 15, n, endpoint=True),
+                                 size=rng.integers(6, 12, n, endpoint=True),
+                                 rgb=rgb,
+                                 alpha=rng.integers(80, 150, n, endpoint=True),
+                                 vx=rng.uniform(-0.5, 0.5, n),
+                                 vy=rng.uniform(-3, -1, n),
+                                 life=rng.integers(40, 70, n, endpoint=True))
 
     def spawn_extra_effects(self):
         if self.ready_for_fire and self.word_length >= 20:
-            for _ in range(4):
-                side = random.choice(['top','bottom','left','right'])
-                if side=='top':
-                    x = random.randint(-30, OVERLAY_WIDTH+30)
-                    y = -random.randint(5,30)
-                elif side=='bottom':
-                    x = random.randint(-30, OVERLAY_WIDTH+30)
-                    y = OVERLAY_HEIGHT + random.randint(5,30)
-                elif side=='left':
-                    x = -random.randint(5,30)
-                    y = random.randint(-20, OVERLAY_HEIGHT+20)
-                else:
-                    x = OVERLAY_WIDTH + random.randint(5,30)
-                    y = random.randint(-20, OVERLAY_HEIGHT+20)
-                size = random.randint(8,16)
-                color = QtGui.QColor(random.randint(100,255), random.randint(50,255), random.randint(50,255), random.randint(100,180))
-                vx = random.uniform(-1,1)
-                vy = random.uniform(-1,0)
-                life = random.randint(50,90)
-                phase = random.uniform(0, 2*math.pi)
-                self.extra_effects.append(FireParticle(x,y,size,color,vx,vy,life,phase))
+            slots = self.extra_effects.free_slots(4)
+            n = len(slots)
+            if not n:
+                return
+            rng = self.extra_effects.rng
+            # 0 top, 1 bottom, 2 left, 3 right; sparks start just outside that edge
+            side = rng.integers(0, 4, n)
+            along_x = rng.integers(-30, OVERLAY_WIDTH+30, n, endpoint=True)
+            along_y = rng.integers(-20, OVERLAY_HEIGHT+20, n, endpoint=True)
+            offset = rng.integers(5, 30, n, endpoint=True)
+            x = np.select([side < 2, side == 2], [along_x, -offset], OVERLAY_WIDTH + offset)
+            y = np.select([side == 0, side == 1], [-offset, OVERLAY_HEIGHT + offset], along_y)
+            self.extra_effects.spawn(slots, x=x, y=y,
+                                     size=rng.integers(8, 16, n, endpoint=True),
+                                     rgb=np.column_stack((rng.integers(100, 255, n, endpoint=True),
+                                                          rng.integers(50, 255, n, endpoint=True),
+                                                          rng.integers(50, 255, n, endpoint=True))),
+                                     alpha=rng.integers(100, 180, n, endpoint=True),
+                                     vx=rng.uniform(-1, 1, n),
+                                     vy=rng.uniform(-1, 0, n),
+                                     life=rng.integers(50, 90, n, endpoint=True))
 
     def update_frame(self):
+        # a capped frame rate runs several animation steps per frame, so the
+        # animation keeps its speed; a stalled GUI thread doesn't fast-forward
+        now = time.perf_counter()
+        steps = 1
+        if self.last_frame is not None:
+            steps = min(10, max(1, round((now - self.last_frame) * 1000 / TICK_MS)))
+        self.last_frame = now
+        for _ in range(steps):
+            self.step()
+        if self.is_idle():
+            self.timer.stop()
+        self.update(self._dirty_region())
+
+    def _dirty_region(self):
+        """Border strips plus where particles were last frame and are now."""
+        rect = QtCore.QRect()
+        for pool in (self.particles, self.extra_effects):
+            box = pool.bounds()
+            if box is not None:
+                rect = rect.united(box)
+        region = QtGui.QRegion(self._border_region).united(self._particle_rect).united(rect)
+        self._particle_rect = rect
+        return region
+
+    def step(self):
         self.fast_phase += 0.05
         if self.fast_phase > 1.0: self.fast_phase = 0.0
 
@@ -153,44 +2174,57 @@ class GlowFrame(QtWidgets.QFrame):
 
         self.spawn_particles()
         self.spawn_extra_effects()
+        self.particles.step(sway_x=0.5, sway_y=0.0, size_jitter=0.5)
+        self.extra_effects.step(sway_x=0.8, sway_y=0.5, size_jitter=0.7)
 
-        for p in self.particles:
-            p.phase += 0.1
-            p.x += math.sin(p.phase)*0.5 + p.vx
-            p.y += p.vy
-            p.size = max(4,p.size + random.uniform(-0.5,0.5))
-            alpha = max(20, min(255, p.color.alpha() + random.randint(-15,15)))
-            p.color.setAlpha(alpha)
-            p.life -= 1
-        self.particles = [p for p in self.particles if p.life>0]
-
-        for p in self.extra_effects:
-            p.phase += 0.1
-            p.x += math.sin(p.phase)*0.8 + p.vx
-            p.y += math.cos(p.phase)*0.5 + p.vy
-            p.size = max(4,p.size + random.uniform(-0.7,0.7))
-            alpha = max(20, min(255, p.color.alpha() + random.randint(-15,15)))
-            p.color.setAlpha(alpha)
-            p.life -=1
-        self.extra_effects = [p for p in self.extra_effects if p.life>0]
-
-        self.update()
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._layer_key = None
 
-    def paintEvent(self,event):
-        painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    def _check_layers(self):
+        key = (self.width(), self.height(), self.devicePixelRatioF())
+        if key == self._layer_key:
+            return
+        self._layer_key = key
         rect = self.rect()
+        self._background = self._render_layer(self._paint_background)
+        self._borders = {}
+        inner = rect.adjusted(BORDER_STRIP, BORDER_STRIP, -BORDER_STRIP, -BORDER_STRIP)
+        self._border_region = QtGui.QRegion(rect).subtracted(QtGui.QRegion(inner))
 
-        for p in self.particles:
-            painter.setBrush(QtGui.QBrush(p.color))
-            painter.setPen(QtCore.Qt.NoPen)
-            painter.drawEllipse(int(p.x),int(p.y),int(p.size),int(p.size))
+    def _render_layer(self, paint):
+        dpr = self.devicePixelRatioF()
+        pixmap = QtGui.QPixmap(int(self.width()*dpr), int(self.height()*dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        paint(painter, self.rect())
+        painter.end()
+        return pixmap
 
-        for p in self.extra_effects:
-            painter.setBrush(QtGui.QBrush(p.color))
-            painter.setPen(QtCore.Qt.NoPen)
-            painter.drawEllipse(int(p.x),int(p.y),int(p.size),int(p.size))
+    def _border_layer(self, key, paint):
+        """
+        A border layer is only kept as the four edge strips it's drawn in,
+        so the whole ring of rotations stays a few MB.
+        """
+        strips = self._borders.get(key)
+        if strips is None:
+            full = self._render_layer(paint)
+            dpr = self.devicePixelRatioF()
+            w, h, t = self.width(), self.height(), BORDER_STRIP
+            strips = []
+            for r in (QtCore.QRect(0, 0, w, t), QtCore.QRect(0, h-t, w, t),
+                      QtCore.QRect(0, t, t, h-2*t), QtCore.QRect(w-t, t, t, h-2*t)):
+                strip = full.copy(QtCore.QRect(int(r.x()*dpr), int(r.y()*dpr),
+                                               int(r.width()*dpr), int(r.height()*dpr)))
+                strip.setDevicePixelRatio(dpr)
+                strips.append((r.topLeft(), strip))
+            self._borders[key] = strips
+        return strips
 
+    @staticmethod
+    def _paint_background(painter, rect):
         bg_grad = QtGui.QLinearGradient(0,0,0,rect.height())
         bg_grad.setColorAt(0, QtGui.QColor(25,25,40,230))
         bg_grad.setColorAt(1, QtGui.QColor(10,10,20,220))
@@ -198,62 +2232,303 @@ class GlowFrame(QtWidgets.QFrame):
         painter.setPen(QtCore.Qt.NoPen)
         painter.drawRoundedRect(rect,14,14)
 
-        border_rect = rect.adjusted(2,2,-2,-2)
-        slow_grad = QtGui.QConicalGradient(border_rect.center(),self.fast_phase*360)
-        slow_grad.setColorAt(0.0,QtGui.QColor(50,150,180,120))
-        slow_grad.setColorAt(0.5,QtGui.QColor(80,180,140,120))
-        slow_grad.setColorAt(1.0,QtGui.QColor(50,150,180,120))
-        pen = QtGui.QPen(QtGui.QBrush(slow_grad),3)
-        painter.setPen(pen)
-        painter.setBrush(QtCore.Qt.NoBrush)
-        painter.drawRoundedRect(border_rect,14,14)
-
-        if not self.glow_active and self.contains_mode:
-            pen = QtGui.QPen(QtGui.QColor(255,80,80,150),3)
+    @staticmethod
+    def _paint_border(phase, contains_mode):
+        def paint(painter, rect):
+            border_rect = rect.adjusted(2,2,-2,-2)
+            slow_grad = QtGui.QConicalGradient(border_rect.center(), phase*360/BORDER_PHASES)
+            slow_grad.setColorAt(0.0,QtGui.QColor(50,150,180,120))
+            slow_grad.setColorAt(0.5,QtGui.QColor(80,180,140,120))
+            slow_grad.setColorAt(1.0,QtGui.QColor(50,150,180,120))
+            pen = QtGui.QPen(QtGui.QBrush(slow_grad),3)
             painter.setPen(pen)
+            painter.setBrush(QtCore.Qt.NoBrush)
             painter.drawRoundedRect(border_rect,14,14)
+            if contains_mode:
+                pen = QtGui.QPen(QtGui.QColor(255,80,80,150),3)
+                painter.setPen(pen)
+                painter.drawRoundedRect(border_rect,14,14)
+        return paint
 
-        if self.glow_alpha>0:
-            fast_grad = QtGui.QConicalGradient(border_rect.center(), self.fast_phase*360)
-            fast_grad.setColorAt(0.0, QtGui.QColor(0,255,255,int(255*self.glow_alpha)))
-            fast_grad.setColorAt(0.5, QtGui.QColor(0,255,128,int(255*self.glow_alpha)))
-            fast_grad.setColorAt(1.0, QtGui.QColor(0,255,255,int(255*self.glow_alpha)))
+    @staticmethod
+    def _paint_glow(phase):
+        # drawn at full strength, glow_alpha is applied as opacity when blitting
+        def paint(painter, rect):
+            border_rect = rect.adjusted(2,2,-2,-2)
+            fast_grad = QtGui.QConicalGradient(border_rect.center(), phase*360/BORDER_PHASES)
+            fast_grad.setColorAt(0.0, QtGui.QColor(0,255,255,255))
+            fast_grad.setColorAt(0.5, QtGui.QColor(0,255,128,255))
+            fast_grad.setColorAt(1.0, QtGui.QColor(0,255,255,255))
             pen = QtGui.QPen(QtGui.QBrush(fast_grad),4)
             painter.setPen(pen)
+            painter.setBrush(QtCore.Qt.NoBrush)
             painter.drawRoundedRect(border_rect,14,14)
+        return paint
+
+    def paintEvent(self,event):
+        self._check_layers()
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        clip = event.rect()
+
+        self.particles.draw(painter, clip)
+        self.extra_effects.draw(painter, clip)
+
+        painter.drawPixmap(0, 0, self._background)
+
+        phase = round(self.fast_phase*BORDER_PHASES) % BORDER_PHASES
+        contains_mode = not self.glow_active and self.contains_mode
+        border = self._border_layer(("border", phase, contains_mode), self._paint_border(phase, contains_mode))
+        for pos, strip in border:
+            painter.drawPixmap(pos, strip)
+
+        if self.glow_alpha>0:
+            painter.setOpacity(self.glow_alpha)
+            for pos, strip in self._border_layer(("glow", phase), self._paint_glow(phase)):
+                painter.drawPixmap(pos, strip)
+        painter.end()
+        if self.on_paint is not None:
+            self.on_paint()
+
+class SuggestionList(QtWidgets.QWidget):
+    """
+    Paints the suggestion rows directly instead of laying out rich text.
+    Each row is split into runs of equally colored letters, and the runs are
+    kept as prepared QStaticText, memoized by (word, typed letters, mode, TAB
+    hint, fuzzy, width), so a keystroke that shows words seen before only
+    draws cached text. A TAB hint that does not fit after its word is elided.
+    """
+    PREFIX = QtGui.QColor("#00ff88")
+    CONTAINS = QtGui.QColor("#3399ff")
+    FUZZY = QtGui.QColor("#ff66cc")
+    OTHER = QtGui.QColor("#ff5555")
+    HINT = QtGui.QColor("#aaaaaa")
+    MESSAGE = QtGui.QColor("#ffffff")
+    TAB_HINT = "\u00a0\u00a0(TAB to auto-complete)"
+    ROW_CACHE = 512
+    TOP = 4  # matches the old label's document margin
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # underscored so QWidget.font() stays reachable
+        self._font = QtGui.QFont("Segoe UI",14)
+        self._bold = QtGui.QFont(self._font)
+        self._bold.setWeight(QtGui.QFont.Bold)
+        self._hint_font = QtGui.QFont(self._font)
+        self._hint_font.setPixelSize(11)
+        # runs name their font by role
+        self._fonts = {"text": self._font, "bold": self._bold, "hint": self._hint_font}
+        self.metrics = {role: QtGui.QFontMetrics(f) for role, f in self._fonts.items()}
+        self.line_height = self.metrics["text"].lineSpacing()
+        self.ascent = self.metrics["text"].ascent()
+        self._row_cache = {}
+        self._row_args = []  # set_rows' rows, rebuilt when the width changes
+        self._rows = []
+        self.words = []  # plain text of the rows on screen
+
+    def _static(self, text, font):
+        static = QtGui.QStaticText(text)
+        static.setTextFormat(QtCore.Qt.PlainText)
+        static.prepare(QtGui.QTransform(), font)
+        return static
+
+    def _runs(self, word, letters, prefix_mode, fuzzy=False):
+        """(text, font role, color) runs with the same coloring as the old HTML.
+        A fuzzy row highlights the corrected prefix passed as letters."""
+        runs = []
+        highlight = not prefix_mode and not fuzzy and letters in word.lower()
+        for i, c in enumerate(word):
+            if fuzzy and i < len(letters):
+                style = ("bold", self.FUZZY)
+            elif prefix_mode and i < len(letters):
+                style = ("bold", self.PREFIX)
+            elif highlight and c.lower() in letters:
+                style = ("bold", self.CONTAINS)
+            else:
+                style = ("text", self.OTHER)
+            if runs and tuple(runs[-1][1:]) == style:
+                runs[-1][0] += c
+            else:
+                runs.append([c, *style])
+        return runs
+
+    def _row(self, word, letters, prefix_mode, tab_hint, fuzzy=False):
+        width = self.width()
+        key = (word, letters, prefix_mode, tab_hint, fuzzy, width)
+        row = self._row_cache.get(key)
+        if row is None:
+            runs = self._runs(word, letters, prefix_mode, fuzzy)
+            if tab_hint:
+                runs.append([" ", "text", self.OTHER])
+                runs.append([self.TAB_HINT, "hint", self.HINT])
+            row, x = [], 0
+            for text, role, color in runs:
+                font, metrics = self._fonts[role], self.metrics[role]
+                if role == "hint":
+                    text = metrics.elidedText(text, QtCore.Qt.ElideRight, width - x)
+                    if len(text.strip("\u00a0\u2026")) < 2:
+                        row.pop()  # no room for more than an ellipsis, nor for the space before it
+                        break
+                # top-left placement, shifted so every run shares the row's baseline
+                row.append((x, self.ascent - metrics.ascent(), self._static(text, font), font, color))
+                x += metrics.horizontalAdvance(text)
+            if len(self._row_cache) >= self.ROW_CACHE:
+                self._row_cache.clear()
+            self._row_cache[key] = row
+        return row
+
+    def set_rows(self, rows):
+        """rows: (word, typed letters, prefix_mode, tab_hint[, fuzzy]) tuples."""
+        self.words = [row[0] for row in rows]
+        self._row_args = rows
+        self._rows = [self._row(*row) for row in rows]
+        self.update()
+
+    def set_message(self, text):
+        self.words = [text]
+        self._row_args = []
+        self._rows = [[(0, 0, self._static(text, self._font), self._font, self.MESSAGE)]]
+        self.update()
+
+    def sizeHint(self):
+        return QtCore.QSize(OVERLAY_WIDTH, self.TOP + self.line_height*SUGGESTION_COUNT)
+
+    def resizeEvent(self, event):
+        # TAB hints are elided to the width, so lay the rows out again
+        if self._row_args:
+            self._rows = [self._row(*row) for row in self._row_args]
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if not self._rows:
+            return
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.TextAntialiasing)
+        for i, row in enumerate(self._rows):
+            top = self.TOP + i*self.line_height
+            for x, dy, static, font, color in row:
+                painter.setFont(font)
+                painter.setPen(color)
+                painter.drawStaticText(x, top + dy, static)
+        painter.end()
 
 class TypingOverlay(QtWidgets.QWidget):
-    update_signal = QtCore.pyqtSignal(str)
+    update_signal = QtCore.pyqtSignal(str, float)  # key, press time (0.0 if not typed by the user)
     autocomplete_signal = QtCore.pyqtSignal(str)
+    tab_signal = QtCore.pyqtSignal()  # TAB from the listener, completed from the shown suggestions
+    autocomplete_done = QtCore.pyqtSignal(int)  # run ID, from the typer thread
     cancel_signal = QtCore.pyqtSignal()  # used to cancel from timers or keys
+    stats_signal = QtCore.pyqtSignal()
 
-    def __init__(self,suggester):
+    def __init__(self,suggester=None,journal=None):
         super().__init__()
-        self.suggester = suggester
+        # without a suggester the overlay takes keys while the dictionary
+        # loads (see attach); the words submitted meanwhile are kept here
+        self.suggester = None
+        self.journal = None  # saves used words and the high score, if given
+        self.pending_words = []
+        self.pending_new_game = False
+        self.load_times = []  # (stage, seconds) of the dictionary loader
         self.buffer = ""
         self.high_score = 0
         self.hidden_mode = False
+        # F6 ranks suggestions by how many letters not used yet this life they cover
+        self.coverage_mode = False
+        self.remaining_letters = ALL_LETTERS
 
         # autocomplete state
         self.autocomplete_in_progress = False
-        self.autocomplete_timers = []  # list of QTimer objects for scheduled char sends
+        self.autocomplete_run = 0  # ID of the typer run in progress
+        self.tab_target = None  # longest prefix suggestion for the buffer on screen
         self.ignore_synthetic = False
         self.expected_synthetic = 0
 
-        # controller for real keystrokes
-        self.kcontroller = KController()
+        # controller for real keystrokes, created on first use
+        self.kcontroller = None
 
         self.MEAN_MS = 100.0   # ≈66.666...
         self.SD_MS = 50.0  
         self.MIN_MS = 40
         self.MAX_MS = 300
         self.KEY_DOWN_MS = 8
+        self.typer = KeystrokeTyper(lambda ch: self.controller().press(ch),
+                                    lambda ch: self.controller().release(ch),
+                                    on_key=lambda ch: self.update_signal.emit(ch, 0.0),
+                                    on_done=self.autocomplete_done.emit,
+                                    mean_ms=self.MEAN_MS, sd_ms=self.SD_MS, min_ms=self.MIN_MS,
+                                    max_ms=self.MAX_MS, key_down_ms=self.KEY_DOWN_MS)
+
+        # per-keystroke latency, shown with F10
+        self.tracer = LatencyTracer()
+        self.trace_slot = None
+        self.show_stats = False
+
+        # suggestions are computed off the GUI thread
+        self.worker = SuggestionWorker(tracer=self.tracer)
+        self.suggest_generation = 0
+        self.worker.ready.connect(self.on_suggestions)
+        self.worker.submitted.connect(self.on_submitted)
+        self.worker.round_reset.connect(self.on_round_reset)
 
         self._build_ui()
+        self.container.on_paint = self.tracer.painted
+        self.stats_timer = QtCore.QTimer(self)
+        self.stats_timer.timeout.connect(self.refresh_stats)
         self.update_signal.connect(self.on_update_signal)
         self.autocomplete_signal.connect(self.start_autocomplete)
+        self.tab_signal.connect(self.autocomplete_longest)
+        self.autocomplete_done.connect(self.finish_autocomplete)
         self.cancel_signal.connect(self.cancel_autocomplete)
+        self.stats_signal.connect(self.toggle_stats)
         self.show()
+        if suggester is not None:
+            self.attach(suggester, journal)
+        else:
+            self.status_label.setText("Loading dictionary...")
+            self.update_ui()
+
+    def controller(self):
+        if self.kcontroller is None:
+            self.kcontroller = _keyboard().Controller()
+        return self.kcontroller
+
+    def attach(self, suggester, journal=None):
+        """Start suggesting from a (possibly still loading) suggester, and
+        apply what was typed before it was there."""
+        self.suggester = suggester
+        self.journal = journal
+        if journal is not None:
+            self.high_score = max(self.high_score, journal.high_score)
+        self.highscore_label.setText(f"High Score: {self.high_score}")
+        self.worker.set_suggester(suggester)
+        if self.pending_new_game:
+            self.start_new_game()
+        for word in self.pending_words:
+            self.submit_word(word)
+        self.pending_words = []
+        self.update_ui(reset=True)
+
+    @QtCore.pyqtSlot(str, float)
+    def on_load_stage(self, stage, seconds):
+        """A loader stage is done: show the progress and answer the buffer again."""
+        self.load_times.append((stage, seconds))
+        if not self.show_stats:
+            self.status_label.setText("Loading: " + self._load_summary() + " ...")
+        if self.suggester is not None:
+            self.update_ui(reset=True)
+
+    @QtCore.pyqtSlot(float)
+    def on_load_finished(self, seconds):
+        if not self.show_stats:
+            self.status_label.setText(f"Ready in {seconds:.2f}s: " + self._load_summary())
+        QtCore.QTimer.singleShot(5000, self.restore_status)
+
+    def _load_summary(self):
+        return ", ".join(f"{stage} {t:.2f}s" for stage, t in self.load_times)
+
+    def restore_status(self):
+        if not self.show_stats:
+            self.status_label.setText(STATUS_TEXT)
 
     def _build_ui(self):
         self.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint|QtCore.Qt.FramelessWindowHint|QtCore.Qt.Tool)
@@ -284,14 +2559,9 @@ class TypingOverlay(QtWidgets.QWidget):
         self.buffer_label.setStyleSheet("color:#ffd580; background: transparent;")
         layout.addWidget(self.buffer_label)
 
-        self.suggest_label = QtWidgets.QLabel("")
-        font2 = QtGui.QFont("Segoe UI",14)
-        self.suggest_label.setFont(font2)
-        self.suggest_label.setWordWrap(True)
-        self.suggest_label.setTextFormat(QtCore.Qt.RichText)
-        self.suggest_label.setMinimumHeight(120)
-        self.suggest_label.setStyleSheet("background: transparent;")
-        layout.addWidget(self.suggest_label)
+        self.suggest_list = SuggestionList()
+        self.suggest_list.setMinimumHeight(120)
+        layout.addWidget(self.suggest_list)
 
         self.next_letter_label = QtWidgets.QLabel("")
         font_hint = QtGui.QFont("Segoe UI",14,QtGui.QFont.Bold)
@@ -307,7 +2577,7 @@ class TypingOverlay(QtWidgets.QWidget):
         self.highscore_label.setStyleSheet("color:#ffaa00; background: transparent;")
         layout.addWidget(self.highscore_label)
 
-        self.status_label = QtWidgets.QLabel("F7: hide/show | F8: quit | Enter: submit/reset | Tab: autocomplete")
+        self.status_label = QtWidgets.QLabel(STATUS_TEXT)
         self.status_label.setStyleSheet("color:#888; font-size:11px; font-family:'Segoe UI'; background: transparent;")
         layout.addWidget(self.status_label)
 
@@ -328,39 +2598,106 @@ class TypingOverlay(QtWidgets.QWidget):
     def mouseReleaseEvent(self,event):
         self.old_pos = None
 
-    def on_update_signal(self,key_char):
+    def on_update_signal(self,key_char,pressed=0.0):
         if not self.isVisible(): return
+        self.trace_slot = self.tracer.start(key_char, pressed)
 
         # If Enter pressed while autocompleting -> cancel instead of submitting.
         if key_char == "ENTER" and self.autocomplete_in_progress:
             self.cancel_autocomplete()
+            self.trace_slot = None  # nothing to suggest, don't pin it on the next update
             return
 
+        reset = False
         if key_char=="BACKSPACE":
             self.buffer = self.buffer[:-1]
             # If user manually backspaces while autocomplete in progress, keep going (but their actions may conflict)
         elif key_char=="ENTER":
-            # submit: if it's a valid word remove it from suggester
-            if self.buffer.lower() in self.suggester._set:
-                self.high_score = max(self.high_score,len(self.buffer))
-                self.highscore_label.setText(f"High Score: {self.high_score}")
-                # remove the submitted word so it won't be suggested again
-                removed = self.suggester.remove_word(self.buffer.lower())
-                if removed:
-                    # small feedback: clear suggestions
-                    pass
+            if self.suggester is None:
+                self.pending_words.append(self.buffer.lower())  # checked once the dictionary is up
+            else:
+                self.submit_word(self.buffer.lower())
             self.buffer = ""
+            reset = True
+        elif key_char=="NEW_GAME":
+            if self.suggester is None:
+                self.pending_new_game = True
+                self.pending_words = []
+            else:
+                self.start_new_game()
+            self.buffer = ""
+            reset = True
+        elif key_char=="COVERAGE":
+            self.coverage_mode = not self.coverage_mode
         else:
             self.buffer += key_char.lower()
-        self.update_ui()
+        self.update_ui(reset)
+
+    def submit_word(self, word):
+        # submit: the worker removes it from the suggester if it's a valid
+        # word, and answers through on_submitted
+        self.worker.submit(word)
+
+    @QtCore.pyqtSlot(str, bool, int)
+    def on_submitted(self, word, valid, word_id):
+        if not valid:
+            return
+        self.high_score = max(self.high_score,len(word))
+        self.highscore_label.setText(f"High Score: {self.high_score}")
+        if word_id < 0:
+            return  # already used this round
+        self.remaining_letters &= ~_letter_mask(word)
+        if not self.remaining_letters:
+            self.remaining_letters = ALL_LETTERS  # whole alphabet used: bonus life, start over
+        if self.journal is not None:
+            self.journal.word_used(word_id)
+            self.journal.set_high_score(self.high_score)
+
+    def start_new_game(self):
+        # every used word becomes available again (on the worker, which
+        # answers through on_round_reset) and the saved game is cleared
+        self.worker.new_round()
+        self.pending_new_game = False
+
+    @QtCore.pyqtSlot()
+    def on_round_reset(self):
+        if self.journal is not None:
+            self.journal.new_game()
+        self.remaining_letters = ALL_LETTERS
 
-    def update_ui(self):
+    def update_ui(self, reset=False):
         self.buffer_label.setText(f"typed: {self.buffer or '(empty)'}")
-        suggestions, prefix_mode = self.suggester.suggest(self.buffer.lower(), SUGGESTION_COUNT)
-        self.container.contains_mode = not prefix_mode
-        self.container.word_length = len(self.buffer)
-        self.container.ready_for_fire = bool(suggestions)
-        self.length_label.setText(f"Length: {len(self.buffer)}")
+        self.container.set_word_length(len(self.buffer))
+        length_text = f"Length: {len(self.buffer)}"
+        if self.coverage_mode:
+            length_text += f" | letters left: {bin(self.remaining_letters).count('1')}"
+        self.length_label.setText(length_text)
+        if self.suggester is None:
+            # keys are kept and answered once the first loading stage is done
+            self.suggest_list.set_message("loading dictionary...")
+            self.trace_slot = None
+            return
+        # suggestions (and whether the buffer is a word) arrive through
+        # on_suggestions once the worker has them
+        self.tab_target = None
+        remaining = self.remaining_letters if self.coverage_mode else None
+        self.suggest_generation = self.worker.request(self.buffer.lower(), reset, remaining)
+        if self.trace_slot is not None:
+            self.tracer.link(self.suggest_generation, self.trace_slot)
+            self.trace_slot = None
+
+    @QtCore.pyqtSlot(int, str, list, bool, list, bool)
+    def on_suggestions(self, generation, letters, suggestions, prefix_mode, corrections, is_word):
+        if generation != self.suggest_generation:
+            return  # the buffer has changed since this was requested
+        trace_slot = self.tracer.render_start(generation)
+        # Glow: highlight when buffer is exactly a word
+        self.container.set_glow(is_word)
+        self.container.set_mode(not prefix_mode, bool(suggestions))
+        if not suggestions and corrections:
+            self.show_corrections(corrections)
+            self.tracer.render_end(trace_slot)
+            return
 
         # Next letter hint
         if not suggestions:
@@ -380,42 +2717,59 @@ class TypingOverlay(QtWidgets.QWidget):
         self.next_letter_label.setText(next_hint)
 
         # Suggestions display (TAB indicator hidden if buffer==longest_word or autocomplete in progress)
-        colored_words = []
-        longest_word = None
-        if suggestions:
+        if not suggestions:
+            self.suggest_list.set_message("no matches" if self.suggester.contains_ready
+                                          else "loading contains search...")
+        else:
+            typed = self.buffer.lower()
             longest_word = max(suggestions, key=len)
-
-        for word in suggestions:
-            colored = ""
-            for i,c in enumerate(word):
-                if prefix_mode and i<len(self.buffer):
-                    colored += f"<span style='color:#00ff88; font-weight:700'>{c}</span>"
-                elif not prefix_mode and self.buffer.lower() in word.lower() and c.lower() in self.buffer.lower():
-                    colored += f"<span style='color:#3399ff; font-weight:700'>{c}</span>"
-                else:
-                    colored += f"<span style='color:#ff5555'>{c}</span>"
-
             # Only show TAB hint when:
             # - word is the longest suggestion
             # - prefix_mode is True
             # - buffer is NOT already equal to that longest word (i.e. not "Longest word possible typed")
             # - and autocomplete is not currently in progress
-            show_tab_hint = (longest_word is not None and word == longest_word and prefix_mode
-                             and (self.buffer.lower() != longest_word.lower())
-                             and (not self.autocomplete_in_progress))
-            if show_tab_hint:
-                colored += " <span style='color:#aaaaaa; font-size:11px'>&nbsp;&nbsp;(TAB to auto-complete)</span>"
-            colored_words.append(colored)
-
-        if not colored_words:
-            self.suggest_label.setText("<span style='color:#ffffff'>no matches</span>")
+            show_tab_hint = (prefix_mode and typed != longest_word.lower()
+                             and not self.autocomplete_in_progress)
+            if prefix_mode and typed != longest_word.lower():
+                self.tab_target = longest_word
+            self.suggest_list.set_rows([(word, typed, prefix_mode, show_tab_hint and word == longest_word)
+                                        for word in suggestions])
+        self.tracer.render_end(trace_slot)
+
+    def show_corrections(self, corrections):
+        """Nothing matches the buffer: words for the nearest corrected prefixes,
+        and how many letters to take back to reach the closest one."""
+        typed = self.buffer.lower()
+        word, n = corrections[0]
+        keep = len(os.path.commonprefix([typed, word[:n]]))
+        self.next_letter_label.setText(f"BACKSPACE x{len(typed) - keep}")
+        self.next_letter_label.setStyleSheet("color:#ff66cc; background: transparent;")
+        self.suggest_list.set_rows([(word, word[:n], False, False, True) for word, n in corrections])
+
+    @QtCore.pyqtSlot()
+    def toggle_stats(self):
+        """F10: show latency percentiles in the status line and dump the trace."""
+        self.show_stats = not self.show_stats
+        if self.show_stats:
+            self.stats_timer.start(500)
+            self.refresh_stats()
         else:
-            self.suggest_label.setText("<br>".join(colored_words))
+            self.stats_timer.stop()
+            self.status_label.setText(STATUS_TEXT)
+        path = os.path.join(_cache_dir(), "latency_trace.json")
+        try:
+            self.tracer.dump(path)
+            print("Latency trace written to", path)
+        except OSError as e:
+            print("Could not write latency trace:", e)
+
+    def refresh_stats(self):
+        self.status_label.setText(self.tracer.summary())
 
-        # Glow: highlight when buffer is exactly a suggestion
-        self.container.set_glow(bool(self.buffer and self.buffer in [s for s,_ in [ (None,None) ] or [] ] ) )  # harmless placeholder
-        # real glow:
-        self.container.set_glow(bool(self.buffer and (self.buffer in self.suggester._set)))
+    def emit_key(self, key_char):
+        # the press time travels with the key, so one typed while the
+        # overlay was hidden can't be matched to a later one
+        self.update_signal.emit(key_char, time.perf_counter())
 
     def handle_key(self,key):
         """
@@ -431,52 +2785,55 @@ class TypingOverlay(QtWidgets.QWidget):
                 return
 
             if hasattr(key,'char') and key.char and re.match(r"[a-zA-Z]",key.char):
-                self.update_signal.emit(key.char)
+                self.emit_key(key.char)
             elif key==keyboard.Key.backspace:
-                self.update_signal.emit("BACKSPACE")
+                self.emit_key("BACKSPACE")
             elif key==keyboard.Key.enter:
-                self.update_signal.emit("ENTER")
+                self.emit_key("ENTER")
             elif key==keyboard.Key.f8:
                 QtWidgets.QApplication.quit()
+            elif key==keyboard.Key.f9:
+                self.update_signal.emit("NEW_GAME", 0.0)
+            elif key==keyboard.Key.f10:
+                self.stats_signal.emit()
+            elif key==keyboard.Key.f6:
+                self.update_signal.emit("COVERAGE", 0.0)
             elif key==keyboard.Key.f7:
                 self.hidden_mode = not self.hidden_mode
                 self.setVisible(not self.hidden_mode)
             elif key==keyboard.Key.tab:
-                # Tab pressed -> try autocomplete (prefix-mode only)
-                suggestions, prefix_mode = self.suggester.suggest(self.buffer.lower(), SUGGESTION_COUNT)
-                if suggestions and prefix_mode:
-                    longest_word = max(suggestions, key=len)
-                    if self.buffer.lower() != longest_word.lower():
-                        # trigger autocomplete request
-                        self.autocomplete_signal.emit(longest_word)
+                # Tab pressed -> try autocomplete (prefix-mode only); the
+                # suggester is left to the worker, this runs in the keyboard hook
+                self.tab_signal.emit()
         except Exception as e:
             print("Key handling error:",e)
 
     @QtCore.pyqtSlot()
     def cancel_autocomplete(self):
         """
-        Stop all scheduled timers and reset autocomplete state.
+        Stop the typer before its next key and reset autocomplete state.
         Called when Enter is pressed during autocomplete or when user manually cancels.
         """
         if not self.autocomplete_in_progress:
             return
-        # stop and delete timers
-        for t in self.autocomplete_timers:
-            try:
-                t.stop()
-            except Exception:
-                pass
-        self.autocomplete_timers = []
+        self.typer.cancel()
         # reset flags so synthetic events will not be ignored forever
         self.autocomplete_in_progress = False
         self.ignore_synthetic = False
         self.expected_synthetic = 0
 
+    @QtCore.pyqtSlot()
+    def autocomplete_longest(self):
+        """TAB: complete the longest suggestion shown for the current buffer,
+        if the worker has answered it yet."""
+        if self.tab_target is not None:
+            self.start_autocomplete(self.tab_target)
+
     @QtCore.pyqtSlot(str)
     def start_autocomplete(self, target_word: str):
         """
-        Schedule real OS key presses for the missing characters of target_word.
-        Each scheduled send is a QTimer we keep a reference to so it can be canceled.
+        Have the typer send real OS key presses for the missing characters of
+        target_word, with randomized gaussian delays (clamped).
         """
         if self.autocomplete_in_progress:
             return
@@ -489,64 +2846,104 @@ class TypingOverlay(QtWidgets.QWidget):
 
         # prepare state
         self.autocomplete_in_progress = True
-        self.autocomplete_timers = []
         # We'll expect one incoming synthetic 'char' event per character (listener consumes that)
         self.expected_synthetic = len(remaining)
         self.ignore_synthetic = True
+        # the typer emits update_signal for each char as it is pressed
+        self.autocomplete_run = self.typer.start(remaining)
 
-        cumulative_ms = 0
-
-        def make_timer_for_char(ch):
-            t = QtCore.QTimer(self)
-            t.setSingleShot(True)
-            def on_timeout():
-                # send the real keystroke to the OS
-                try:
-                    self.kcontroller.press(ch)
-                    # release shortly after
-                    release_timer = QtCore.QTimer(self)
-                    release_timer.setSingleShot(True)
-                    release_timer.timeout.connect(lambda: self.kcontroller.release(ch))
-                    release_timer.start(self.KEY_DOWN_MS)
-                except Exception as e:
-                    print("Controller send error:", e)
-                # update overlay immediately
-                self.update_signal.emit(ch)
-            t.timeout.connect(on_timeout)
-            return t
-
-        # schedule timers with randomized gaussian delays (clamped)
-        for ch in remaining:
-            # gaussian jitter around MEAN_MS, clamped
-            delay = int(max(self.MIN_MS, min(self.MAX_MS, random.gauss(self.MEAN_MS, self.SD_MS))))
-            cumulative_ms += delay
-            t = make_timer_for_char(ch)
-            # start timer after cumulative_ms
-            t.start(cumulative_ms)
-            self.autocomplete_timers.append(t)
-
-        # schedule a final timer to clear autocomplete state a bit after last char
-        fin = QtCore.QTimer(self)
-        fin.setSingleShot(True)
-        def finish():
-            # cleanup only if not cancelled already
-            self.autocomplete_timers = []
-            self.autocomplete_in_progress = False
-            # allow the listener to process any trailing synthetic events for safety
-            # give a small grace window before resetting ignore flag to avoid race
-            self.ignore_synthetic = False
-            self.expected_synthetic = 0
-        fin.timeout.connect(finish)
-        fin.start(cumulative_ms + 40)
+    @QtCore.pyqtSlot(int)
+    def finish_autocomplete(self, run):
+        # a cancelled run may report after the next one started
+        if run != self.autocomplete_run or not self.autocomplete_in_progress:
+            return
+        self.autocomplete_in_progress = False
+        self.ignore_synthetic = False
+        self.expected_synthetic = 0
 
 def main():
-    words = load_wordlist()
-    suggester = WordSuggester(words)
-    app = QtWidgets.QApplication(sys.argv)
-    overlay = TypingOverlay(suggester)
-    listener = keyboard.Listener(on_press=overlay.handle_key)
+    parser = argparse.ArgumentParser(description="WordBomb typing overlay")
+    parser.add_argument("--compile", action="store_true", help="write the compiled dictionary next to the word list and exit")
+    parser.add_argument("--fps", type=float, help="frame-rate cap for the animation")
+    parser.add_argument("--low-power", action="store_true", help=f"animate at {1000 // LOW_POWER_FRAME_MS} fps")
+    parser.add_argument("--animate-idle", action="store_true", help="keep the border rotating while nothing else moves")
+    parser.add_argument("--daemon", action="store_true", help="serve suggestions to every overlay on this machine")
+    parser.add_argument("--use-daemon", action="store_true", help="get suggestions from the daemon (started if needed)")
+    parser.add_argument("--profile", default="", help="separate saved game for this overlay instance")
+    parser.add_argument("--query", nargs="?", const="-", metavar="FILE",
+                        help="answer prompts from FILE (or stdin) as JSON lines instead of starting the overlay")
+    parser.add_argument("--workers", type=int, help="processes for --query (default: one per core)")
+    parser.add_argument("--limit", type=int, default=SUGGESTION_COUNT,
+                        help=f"suggestions per prompt for --query (at most {PREFIX_TOP_K})")
+    parser.add_argument("--coverage", action="store_true", help="rank --query answers by letter coverage")
+    args, qt_args = parser.parse_known_args()
+    if not 1 <= args.limit <= PREFIX_TOP_K:
+        parser.error(f"--limit must be between 1 and {PREFIX_TOP_K}, the words cached per prefix")
+    if args.compile:
+        compile_wordlist()
+        return
+    if args.query is not None:
+        try:
+            if args.query == "-":
+                run_queries(sys.stdin, sys.stdout, args.workers, args.limit, args.coverage)
+            else:
+                with open(args.query, encoding="utf-8") as f:
+                    run_queries(f, sys.stdout, args.workers, args.limit, args.coverage)
+        except BrokenPipeError:
+            # reader went away (e.g. piped into head); don't fail again at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    if args.daemon:
+        run_daemon()
+        return
+    # window and keyboard hook first, the dictionary loads behind them
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    overlay = TypingOverlay()
+    overlay.container.set_frame_rate(args.fps, args.low_power, args.animate_idle)
+    listener = _keyboard().Listener(on_press=overlay.handle_key)
     listener.start()
-    sys.exit(app.exec_())
+    profile = "-" + re.sub(r"[^\w-]", "_", args.profile) if args.profile else ""
+    journals = []
+
+    def sources():
+        suggester = connect_daemon() if args.use_daemon else None
+        if suggester is not None:
+            yield "daemon", suggester
+            return
+        if args.use_daemon:
+            print("Suggestion daemon unavailable, loading the dictionary here")
+        yield from load_stages()
+
+    def stages():
+        # the saved game is replayed here on the loader thread, which may
+        # mean a round-trip to the daemon
+        for stage, suggester in sources():
+            if not journals:
+                journal = GameJournal(os.path.join(_cache_dir(), JOURNAL_NAME.format(profile)), suggester.digest)
+                try:
+                    journal.replay(suggester)
+                except OSError as e:
+                    print("Journal error:", e)
+                journals.append(journal)
+            yield stage, suggester
+
+    def on_stage(suggester, stage, seconds):
+        if overlay.suggester is None:
+            overlay.attach(suggester, journals[0])
+        overlay.on_load_stage(stage, seconds)
+
+    loader = DictionaryLoader(stages)
+    loader.stage.connect(on_stage)
+    loader.finished.connect(overlay.on_load_finished)
+    loader.failed.connect(lambda error: overlay.status_label.setText(f"Dictionary failed to load: {error}"))
+    loader.start()
+    code = app.exec_()
+    for journal in journals:
+        journal.close()
+    sys.exit(code)
 
 if __name__=="__main__":
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()  # --query workers of the bundled exe
     main()